@@ -6,15 +6,16 @@ BaseSettings, which loads values from environment variables or .env files.
 """
 
 import secrets
+import sys
+from functools import cached_property, lru_cache
 from typing import Any, Dict, List, Optional, Union
 
-from loguru import logger
 from pydantic import (
     AnyHttpUrl,
-    EmailStr,
     Field,
     PostgresDsn,
     SecretStr,
+    computed_field,
     field_validator,
 )
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -67,8 +68,16 @@ class Settings(BaseSettings):
     SMTP_HOST: Optional[str] = None
     SMTP_USER: Optional[str] = None
     SMTP_PASSWORD: Optional[SecretStr] = None
-    EMAILS_FROM_EMAIL: Optional[EmailStr] = None
+    EMAILS_FROM_EMAIL: Optional[str] = None
     EMAILS_FROM_NAME: Optional[str] = None
+
+    @field_validator("EMAILS_FROM_EMAIL", "FIRST_SUPERUSER_EMAIL")
+    @classmethod
+    def validate_email(cls, v: Optional[str]) -> Optional[str]:
+        """Check configured email addresses without pulling in email-validator."""
+        if v is None or "@" in v.strip("@"):
+            return v
+        raise ValueError(f"Invalid email address: {v}")
     
     # LangGraph Configuration
     LANGGRAPH_TRACING_ENABLED: bool = False
@@ -82,7 +91,7 @@ class Settings(BaseSettings):
     ENVIRONMENT: str = "development"  # development, staging, production
     
     # Admin User
-    FIRST_SUPERUSER_EMAIL: Optional[EmailStr] = None
+    FIRST_SUPERUSER_EMAIL: Optional[str] = None
     FIRST_SUPERUSER_PASSWORD: Optional[SecretStr] = None
     
     # Vercel Integration
@@ -111,7 +120,11 @@ class Settings(BaseSettings):
     
     def configure_logging(self) -> None:
         """Configure loguru logger based on settings."""
+        from loguru import logger
+
         log_level = self.LOG_LEVEL.upper()
+        # Variable-level tracebacks are costly; only capture them in development
+        diagnose = self.ENVIRONMENT == "development"
         logger.remove()  # Remove default handler
         logger.add(
             "logs/api.log",
@@ -120,7 +133,8 @@ class Settings(BaseSettings):
             level=log_level,
             format=self.LOG_FORMAT,
             backtrace=True,
-            diagnose=True,
+            diagnose=diagnose,
+            enqueue=True,
         )
         logger.add(
             "logs/errors.log",
@@ -129,28 +143,47 @@ class Settings(BaseSettings):
             level="ERROR",
             format=self.LOG_FORMAT,
             backtrace=True,
-            diagnose=True,
+            diagnose=diagnose,
+            enqueue=True,
         )
         # Console logger
         logger.add(
-            sink=lambda msg: print(msg),
+            sink=sys.stderr,
             colorize=True,
             level=log_level,
             format=self.LOG_FORMAT,
             backtrace=True,
-            diagnose=self.DEBUG,
+            diagnose=self.DEBUG and diagnose,
+            enqueue=True,
         )
         logger.info(f"Logging configured with level: {log_level}")
     
+    @cached_property
+    def cors_origin_strs(self) -> List[str]:
+        """CORS origins as plain strings for the middleware."""
+        return [str(origin) for origin in self.BACKEND_CORS_ORIGINS]
+    
+    @computed_field  # type: ignore[prop-decorator]
+    @cached_property
+    def async_database_url(self) -> str:
+        """Database URL rewritten for the asyncpg driver."""
+        return str(self.DATABASE_URL).replace("postgresql://", "postgresql+asyncpg://")
+    
     def get_database_connection_parameters(self) -> Dict[str, Any]:
         """Get database connection parameters for SQLAlchemy."""
         return {
-            "url": str(self.DATABASE_URL).replace("postgresql://", "postgresql+asyncpg://"),
+            "url": self.async_database_url,
             "echo": self.DB_ECHO,
             "pool_size": self.DB_POOL_SIZE,
             "max_overflow": self.DB_MAX_OVERFLOW,
         }
 
 
-# Create global settings instance
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the cached application settings, parsing the environment once."""
+    return Settings()
+
+
+# Global settings instance kept for module-level consumers
+settings = get_settings()
@@ -7,48 +7,20 @@ sets up database connections, and registers API routes.
 
 import logging
 from contextlib import asynccontextmanager
-from typing import Annotated, Any, Dict, List
+from typing import Annotated, Any, Dict
 
 from fastapi import Depends, FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from loguru import logger
-from pydantic import PostgresDsn
-from pydantic_settings import BaseSettings, SettingsConfigDict
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
-
-
-class Settings(BaseSettings):
-    """Application settings loaded from environment variables."""
-    
-    # API Configuration
-    API_V1_STR: str = "/api/v1"
-    PROJECT_NAME: str = "CommandCore SaaS Forge API"
-    DEBUG: bool = False
-    VERSION: str = "0.1.0"
-    
-    # CORS Configuration
-    BACKEND_CORS_ORIGINS: List[str] = ["http://localhost:3000", "https://commandcore.app"]
-    
-    # Database Configuration
-    DATABASE_URL: PostgresDsn
-    DB_POOL_SIZE: int = 5
-    DB_MAX_OVERFLOW: int = 10
-    DB_ECHO: bool = False
-    
-    # Security
-    SECRET_KEY: str
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
-    
-    # OpenAI Configuration
-    OPENAI_API_KEY: str
-    
-    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", case_sensitive=True)
-
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
-# Initialize settings
-settings = Settings()
+from app.config import Settings, get_settings, settings
 
 # Configure logging
 logging.basicConfig(
@@ -58,15 +30,16 @@ logging.basicConfig(
 
 # Database setup
 engine = create_async_engine(
-    str(settings.DATABASE_URL).replace("postgresql://", "postgresql+asyncpg://"),
+    settings.async_database_url,
     echo=settings.DB_ECHO,
     pool_size=settings.DB_POOL_SIZE,
     max_overflow=settings.DB_MAX_OVERFLOW,
 )
 
-async_session_maker = sessionmaker(
-    engine, class_=AsyncSession, expire_on_commit=False
-)
+async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+# Statement reused by every database health probe
+_HEALTH_STMT = text("SELECT 1")
 
 
 async def get_db() -> AsyncSession:
@@ -102,31 +75,38 @@ app = FastAPI(
     docs_url=f"{settings.API_V1_STR}/docs",
     redoc_url=f"{settings.API_V1_STR}/redoc",
     debug=settings.DEBUG,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan,
 )
 
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[str(origin) for origin in settings.BACKEND_CORS_ORIGINS],
+    allow_origins=settings.cors_origin_strs,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type", "X-Requested-With"],
 )
 
 
 # Request logging middleware
-@app.middleware("http")
 async def log_requests(request: Request, call_next):
     """Log all requests and their processing time."""
-    logger.debug(f"Request: {request.method} {request.url}")
+    logger.opt(lazy=True).debug(
+        "Request: {}", lambda: f"{request.method} {request.url}"
+    )
     response = await call_next(request)
     return response
 
 
+# Only pay for the extra middleware hop when debug logging is wanted
+if settings.DEBUG:
+    app.middleware("http")(log_requests)
+
+
 # Health check endpoints
 @app.get("/health", tags=["Health"])
-async def health_check():
+async def health_check(settings: Annotated[Settings, Depends(get_settings)]):
     """Health check endpoint."""
     return {"status": "ok", "version": settings.VERSION}
 
@@ -136,7 +116,7 @@ async def db_health_check(db: Annotated[AsyncSession, Depends(get_db)]):
     """Database connection health check."""
     try:
         # Execute a simple query to check database connection
-        result = await db.execute("SELECT 1")
+        result = await db.execute(_HEALTH_STMT)
         if result.scalar() == 1:
             return {"status": "ok", "database": "connected"}
         return {"status": "error", "database": "query failed"}
@@ -150,19 +130,19 @@ async def db_health_check(db: Annotated[AsyncSession, Depends(get_db)]):
 
 # Error handlers
 @app.exception_handler(HTTPException)
-async def http_exception_handler(request: Request, exc: HTTPException) -> JSONResponse:
+async def http_exception_handler(request: Request, exc: HTTPException) -> ORJSONResponse:
     """Handle HTTP exceptions."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail},
     )
 
 
 @app.exception_handler(Exception)
-async def general_exception_handler(request: Request, exc: Exception) -> JSONResponse:
+async def general_exception_handler(request: Request, exc: Exception) -> ORJSONResponse:
     """Handle general exceptions."""
     logger.error(f"Unhandled exception: {exc}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"detail": "Internal server error"},
     )
@@ -176,7 +156,9 @@ async def general_exception_handler(request: Request, exc: Exception) -> JSONRes
 
 # Root endpoint
 @app.get("/", tags=["Root"])
-async def root() -> Dict[str, Any]:
+async def root(
+    settings: Annotated[Settings, Depends(get_settings)],
+) -> Dict[str, Any]:
     """Root endpoint with API information."""
     return {
         "name": settings.PROJECT_NAME,
@@ -195,4 +177,7 @@ if __name__ == "__main__":
         port=8000,
         reload=settings.DEBUG,
         log_level="info" if not settings.DEBUG else "debug",
+        loop="uvloop",
+        http="httptools",
+        access_log=False,
     )
@@ -7,8 +7,9 @@ These agents automate various aspects of SaaS product development, from ideation
 
 __version__ = "0.1.0"
 
+import importlib
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Any, Dict, List, Optional
 
 # Configure basic logging for the package
 logging.basicConfig(
@@ -17,19 +18,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Import core components that should be available at the package level
-try:
-    from langgraph.graph import StateGraph, END
-    from langgraph.checkpoint import MemorySaver
-    from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-    from langchain_openai import ChatOpenAI
-except ImportError:
-    logger.warning(
-        "Some dependencies are not installed. "
-        "Please install the package with 'pip install -e .[dev]' "
-        "to ensure all dependencies are available."
-    )
-
 # Export public API
 __all__ = [
     "create_idea_agent",
@@ -39,6 +27,15 @@ __all__ = [
     "AgentRegistry",
 ]
 
+# Public factories resolved lazily from their submodules on first access
+_LAZY_ATTRS: Dict[str, str] = {
+    "create_idea_agent": ".idea_agent",
+    "create_product_agent": ".product_agent",
+    "create_deployment_agent": ".deployment_agent",
+    "create_marketing_agent": ".marketing_agent",
+}
+
+
 # Agent registry to keep track of all available agents
 class AgentRegistry:
     """Registry for all available LangGraph workflow agents."""
@@ -46,24 +43,38 @@ class AgentRegistry:
     _agents: Dict[str, Any] = {}
     
     @classmethod
-    def register(cls, name: str, agent_factory: Any) -> Any:
-        """Register an agent factory function with the registry."""
+    def register(cls, name: str, agent_factory: Optional[Any] = None) -> Any:
+        """Register an agent factory function with the registry.
+        
+        Can be called directly or used as a decorator via ``register(name)``.
+        """
+        if agent_factory is None:
+            return lambda factory: cls.register(name, factory)
         cls._agents[name] = agent_factory
         return agent_factory
     
     @classmethod
     def get(cls, name: str) -> Optional[Any]:
-        """Get an agent factory by name."""
+        """Get an agent factory by name, importing its module if needed."""
+        if name not in cls._agents and f".{name}" in _LAZY_ATTRS.values():
+            importlib.import_module(f".{name}", __name__)
         return cls._agents.get(name)
     
     @classmethod
     def list_agents(cls) -> List[str]:
-        """List all registered agent names."""
-        return list(cls._agents.keys())
+        """List all registered and lazily loadable agent names."""
+        names = list(cls._agents.keys())
+        for module in _LAZY_ATTRS.values():
+            if module[1:] not in names:
+                names.append(module[1:])
+        return names
 
 
-# These will be implemented in separate modules and imported here
-from .idea_agent import create_idea_agent
-from .product_agent import create_product_agent
-from .deployment_agent import create_deployment_agent
-from .marketing_agent import create_marketing_agent
+def __getattr__(name: str) -> Any:
+    """Import agent factories on first access (PEP 562)."""
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
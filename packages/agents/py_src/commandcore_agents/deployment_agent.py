@@ -5,17 +5,41 @@ This module provides a LangGraph workflow agent for SaaS product deployment.
 The agent automates the deployment process to platforms like Vercel and Railway.
 """
 
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Any, Dict, List, Literal, Optional, TypedDict, Union, cast
-
-from langchain.output_parsers import PydanticOutputParser
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+import orjson
+import tiktoken
+from langchain_core.messages import BaseMessage
+from langchain_core.prompts import (
+    ChatPromptTemplate,
+    HumanMessagePromptTemplate,
+    SystemMessagePromptTemplate,
+)
+from langchain_core.utils.json import parse_json_markdown
 from langchain_openai import ChatOpenAI
-from langgraph.checkpoint import MemorySaver
+from langgraph.cache.base import BaseCache
+from langgraph.cache.memory import InMemoryCache
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.config import get_stream_writer
 from langgraph.graph import END, StateGraph
-from pydantic import BaseModel, Field, validator
+from langgraph.types import CachePolicy
+from pydantic import BaseModel, Field
 
 from . import AgentRegistry
 
@@ -82,24 +106,32 @@ class DeploymentResult(BaseModel):
     )
 
 
+class DeploymentBundle(BaseModel):
+    """Plan, configuration, and result produced together in a single call."""
+    
+    deployment_plan: DeploymentPlan = Field(..., description="Deployment plan")
+    deployment_config: DeploymentConfig = Field(..., description="Deployment configuration")
+    deployment_result: DeploymentResult = Field(..., description="Simulated deployment result")
+
+
 # Define the state for the deployment agent workflow
-class DeploymentAgentState(TypedDict):
+@dataclass(slots=True)
+class DeploymentAgentState:
     """State maintained throughout the deployment agent workflow."""
     
     # Input parameters
     product_spec: Dict[str, Any]
     target_platform: str
-    environment_variables: Optional[Dict[str, str]]
-    domain: Optional[str]
+    environment_variables: Optional[Dict[str, str]] = None
+    domain: Optional[str] = None
     
     # Intermediate and output data
-    deployment_plan: Optional[Dict[str, Any]]
-    deployment_config: Optional[Dict[str, Any]]
-    deployment_result: Optional[Dict[str, Any]]
+    deployment_plan: Optional[Dict[str, Any]] = None
+    deployment_config: Optional[Dict[str, Any]] = None
+    deployment_result: Optional[Dict[str, Any]] = None
     
     # Control flow
-    next: Optional[str]
-    error: Optional[str]
+    error: Optional[str] = None
 
 
 # Define system prompts for different stages
@@ -163,231 +195,391 @@ Be realistic in your simulation. Consider potential issues and how they might be
 Return your result in a structured format that matches the DeploymentResult model.
 """
 
+DEPLOYMENT_BUNDLE_PROMPT = """You are an expert DevOps engineer specializing in {target_platform} deployments.
+Your task is to plan, configure, and simulate the deployment of the following product in one pass:
 
-# Define the workflow nodes
-def create_deployment_plan(state: DeploymentAgentState) -> DeploymentAgentState:
-    """Create a deployment plan based on the product specification."""
+{product_spec_json}
+
+Target platform: {target_platform}
+Domain (if specified): {domain}
+
+Environment variables to include:
+{environment_variables_json}
+
+Provide all three of the following:
+1. A deployment plan: components, dependencies, step-by-step process, platform configuration,
+   estimated time, and post-deployment tasks
+2. A deployment configuration: platform-specific settings, environment variables, resource
+   requirements, scaling, and networking and security settings
+3. A simulated deployment result: status, URL (use a placeholder if needed), logs, metrics,
+   issues encountered, and recommendations for improvement
+
+Be specific, practical, and realistic. Keep the configuration consistent with the plan, and the result consistent with both.
+Return your answer in a structured format that matches the DeploymentBundle model.
+"""
+
+
+# Prompt templates are built once at import and reused by every invocation
+_PLAN_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(DEPLOYMENT_PLAN_PROMPT),
+    HumanMessagePromptTemplate.from_template("Please create a deployment plan based on the provided information."),
+])
+
+_CONFIG_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(DEPLOYMENT_CONFIG_PROMPT),
+    HumanMessagePromptTemplate.from_template("Please create a deployment configuration based on the provided plan."),
+])
+
+_EXEC_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(DEPLOYMENT_EXECUTION_PROMPT),
+    HumanMessagePromptTemplate.from_template("Please simulate the execution of the deployment based on the provided plan and configuration."),
+])
+
+_BUNDLE_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(DEPLOYMENT_BUNDLE_PROMPT),
+    HumanMessagePromptTemplate.from_template("Please plan, configure, and simulate the deployment based on the provided information."),
+])
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize an object to compact JSON for embedding in a prompt.
+    
+    Pretty-printing adds tokens without helping the model, so none is applied.
+    orjson serializes prompt-sized payloads in well under a millisecond, so
+    this runs inline rather than paying for a worker-thread hop.
+    """
+    return orjson.dumps(obj).decode()
+
+
+def _serialize_variables(variables: Dict[str, Any]) -> Dict[str, Any]:
+    """Serialize the *_json prompt variables, leaving plain values untouched."""
+    return {
+        key: _dumps(value) if key.endswith("_json") else value
+        for key, value in variables.items()
+    }
+
+
+def _cache_key(*values: Any) -> str:
+    """Build a stable node-cache key from the state values a node reads."""
+    payload = orjson.dumps(values, option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+# Cache policies keyed on the inputs each node actually depends on
+_CACHE_TTL = 3600  # seconds
+
+_PLAN_CACHE_POLICY = CachePolicy(
+    key_func=lambda s: _cache_key(s.product_spec, s.target_platform, s.domain),
+    ttl=_CACHE_TTL,
+)
+
+_CONFIG_CACHE_POLICY = CachePolicy(
+    key_func=lambda s: _cache_key(
+        s.deployment_plan, s.target_platform, s.environment_variables
+    ),
+    ttl=_CACHE_TTL,
+)
+
+_EXEC_CACHE_POLICY = CachePolicy(
+    key_func=lambda s: _cache_key(
+        s.deployment_plan, s.deployment_config, s.target_platform
+    ),
+    ttl=_CACHE_TTL,
+)
+
+_BUNDLE_CACHE_POLICY = CachePolicy(
+    key_func=lambda s: _cache_key(
+        s.product_spec, s.target_platform, s.domain, s.environment_variables
+    ),
+    ttl=_CACHE_TTL,
+)
+
+
+# Fixed sampling seed so identical prompts give reproducible, cacheable output
+_SEED = 42
+
+
+@lru_cache(maxsize=8)
+def _get_llm(model: str, temperature: float, streaming: bool) -> ChatOpenAI:
+    """Return a shared chat model so nodes reuse one pooled HTTP client."""
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        streaming=streaming,
+        seed=_SEED,
+    )
+
+
+# Prompts above this size are rejected before spending an LLM round-trip
+_MAX_PROMPT_TOKENS = 120_000
+
+
+@lru_cache(maxsize=8)
+def _get_encoder(model: str) -> Optional[tiktoken.Encoding]:
+    """
+    Return the tokenizer for a model, loaded once per process.
+    
+    tiktoken downloads its BPE files on first use, so on offline hosts this
+    returns None and token counts fall back to an estimate.
+    """
     try:
-        product_spec = state.get("product_spec")
-        target_platform = state.get("target_platform")
-        domain = state.get("domain")
-        
-        if not product_spec or not target_platform:
-            logger.error("Missing required information for deployment plan creation")
-            return {
-                **state, 
-                "error": "Missing product specification or target platform", 
-                "next": END
-            }
-        
-        logger.info(f"Creating deployment plan for platform: {target_platform}")
-        
-        # Create the LLM
-        llm = ChatOpenAI(model="gpt-4o", temperature=0.3)
-        
-        # Create the prompt
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=DEPLOYMENT_PLAN_PROMPT),
-            HumanMessage(content="Please create a deployment plan based on the provided information."),
-        ])
-        
-        # Format the prompt
-        formatted_prompt = prompt.format(
-            product_spec_json=json.dumps(product_spec, indent=2),
-            target_platform=target_platform,
-            domain=domain or "Not specified",
-        )
-        
-        # Generate deployment plan
-        response = llm.invoke([SystemMessage(content=formatted_prompt)])
-        
-        # Parse the response
         try:
-            # Try to extract JSON if the model enclosed it in code blocks
-            content = response.content
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-                deployment_plan = json.loads(json_str)
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0].strip()
-                deployment_plan = json.loads(json_str)
-            else:
-                # Fallback to treating the entire response as JSON
-                deployment_plan = json.loads(content)
-            
-            logger.info(f"Successfully created deployment plan for {target_platform}")
-            return {
-                **state, 
-                "deployment_plan": deployment_plan, 
-                "next": "create_deployment_config"
-            }
-        except json.JSONDecodeError:
-            logger.error("Failed to parse deployment plan as JSON")
-            return {
-                **state, 
-                "error": "Failed to parse deployment plan", 
-                "next": END
-            }
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
     except Exception as e:
-        logger.error(f"Error in create_deployment_plan: {str(e)}")
-        return {**state, "error": str(e), "next": END}
+        logger.warning(
+            f"Could not load the tokenizer for {model}, estimating tokens: {str(e)}"
+        )
+        return None
+
 
+def _count_tokens(messages: List[BaseMessage], model: str) -> int:
+    """Count the prompt tokens in a list of messages."""
+    encoder = _get_encoder(model)
+    if encoder is None:
+        # Roughly four characters per token
+        return sum(len(message.content) // 4 for message in messages)
+    return sum(len(encoder.encode(message.content)) for message in messages)
 
-def create_deployment_config(state: DeploymentAgentState) -> DeploymentAgentState:
-    """Create deployment configuration based on the deployment plan."""
+
+async def _generate(
+    llm: ChatOpenAI,
+    messages: List[BaseMessage],
+    output_model: type[BaseModel],
+    node: str,
+    streaming: bool,
+) -> Dict[str, Any]:
+    """
+    Run the LLM and return its output as a validated dict for output_model.
+    
+    Non-streaming calls use structured output. Streaming calls bind
+    output_model as a forced function call and parse its arguments as they
+    arrive with a partial-JSON parser; each partial result is emitted on
+    LangGraph's custom stream under the node name.
+    """
+    if not streaming:
+        result = await llm.with_structured_output(output_model).ainvoke(messages)
+        return result.model_dump()
+    
+    bound_llm = llm.bind_tools([output_model], tool_choice=output_model.__name__)
+    writer = get_stream_writer()
+    buffer = ""
+    async for chunk in bound_llm.astream(messages):
+        args = "".join(
+            tool_call_chunk["args"] or "" for tool_call_chunk in chunk.tool_call_chunks
+        )
+        buffer += args
+        # Re-parse whenever a value closes
+        if "}" in args or "]" in args:
+            try:
+                writer({node: parse_json_markdown(buffer)})
+            except json.JSONDecodeError:
+                pass
+    # Validate once at the node boundary so malformed output fails here
+    return output_model.model_validate_json(buffer).model_dump()
+
+
+@dataclass(frozen=True, slots=True)
+class Stage:
+    """Description of one LLM-backed step of the deployment workflow."""
+    
+    name: str
+    prompt: ChatPromptTemplate
+    required_state: Tuple[str, ...]
+    # Prompt variables; values for *_json keys are serialized by the runner
+    prompt_variables: Callable[[DeploymentAgentState], Dict[str, Any]]
+    output_model: type[BaseModel]
+    # State key for the output; None merges the output's fields into the state
+    output_key: Optional[str]
+    next_node: str
+    cache_policy: CachePolicy
+
+
+async def _run_llm_stage(
+    state: DeploymentAgentState,
+    *,
+    stage: Stage,
+    model: str = "gpt-4o",
+    temperature: float = 0.0,
+    streaming: bool = False,
+) -> Dict[str, Any]:
+    """
+    Run a single workflow stage and return the state update it produces.
+    
+    Invalid input is reported through the state's error field. LLM and
+    transport errors propagate instead, since LangGraph never caches a failed
+    node, so a transient failure is not replayed from the node cache.
+    """
+    missing = [key for key in stage.required_state if not getattr(state, key)]
+    if missing:
+        logger.error(f"Missing required information for {stage.name}")
+        return {"error": f"Missing {', '.join(missing)} for {stage.name}"}
+    
+    target_platform = state.target_platform
+    logger.info(f"Running {stage.name} for platform: {target_platform}")
+    
+    # Get the shared LLM and format the prompt
+    llm = _get_llm(model, temperature, streaming)
+    variables = _serialize_variables(stage.prompt_variables(state))
+    messages = stage.prompt.format_messages(**variables)
+    
+    prompt_tokens = _count_tokens(messages, model)
+    if prompt_tokens > _MAX_PROMPT_TOKENS:
+        logger.error(f"Prompt for {stage.name} is too large: {prompt_tokens} tokens")
+        return {"error": f"Prompt too large: {prompt_tokens} tokens"}
+    
     try:
-        deployment_plan = state.get("deployment_plan")
-        target_platform = state.get("target_platform")
-        environment_variables = state.get("environment_variables") or {}
-        
-        if not deployment_plan or not target_platform:
-            logger.error("Missing required information for deployment configuration creation")
-            return {
-                **state, 
-                "error": "Missing deployment plan or target platform", 
-                "next": END
-            }
-        
-        logger.info(f"Creating deployment configuration for platform: {target_platform}")
-        
-        # Create the LLM
-        llm = ChatOpenAI(model="gpt-4o", temperature=0.3)
-        
-        # Create the prompt
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=DEPLOYMENT_CONFIG_PROMPT),
-            HumanMessage(content="Please create a deployment configuration based on the provided plan."),
-        ])
-        
-        # Format the prompt
-        formatted_prompt = prompt.format(
-            deployment_plan_json=json.dumps(deployment_plan, indent=2),
-            target_platform=target_platform,
-            environment_variables_json=json.dumps(environment_variables, indent=2),
+        output = await _generate(
+            llm, messages, stage.output_model, stage.name, streaming
         )
-        
-        # Generate deployment configuration
-        response = llm.invoke([SystemMessage(content=formatted_prompt)])
-        
-        # Parse the response
-        try:
-            # Try to extract JSON if the model enclosed it in code blocks
-            content = response.content
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-                deployment_config = json.loads(json_str)
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0].strip()
-                deployment_config = json.loads(json_str)
-            else:
-                # Fallback to treating the entire response as JSON
-                deployment_config = json.loads(content)
-            
-            logger.info(f"Successfully created deployment configuration for {target_platform}")
-            return {
-                **state, 
-                "deployment_config": deployment_config, 
-                "next": "execute_deployment"
-            }
-        except json.JSONDecodeError:
-            logger.error("Failed to parse deployment configuration as JSON")
-            return {
-                **state, 
-                "error": "Failed to parse deployment configuration", 
-                "next": END
-            }
     except Exception as e:
-        logger.error(f"Error in create_deployment_config: {str(e)}")
-        return {**state, "error": str(e), "next": END}
+        logger.error(f"Error in {stage.name}: {str(e)}")
+        raise
+    
+    logger.info(f"Successfully completed {stage.name} for {target_platform}")
+    return {stage.output_key: output} if stage.output_key else output
+
+
+# Define the workflow stages
+PLAN_STAGE = Stage(
+    name="create_deployment_plan",
+    prompt=_PLAN_PROMPT,
+    required_state=("product_spec", "target_platform"),
+    prompt_variables=lambda state: {
+        "product_spec_json": state.product_spec,
+        "target_platform": state.target_platform,
+        "domain": state.domain or "Not specified",
+    },
+    output_model=DeploymentPlan,
+    output_key="deployment_plan",
+    next_node="create_deployment_config",
+    cache_policy=_PLAN_CACHE_POLICY,
+)
+
+CONFIG_STAGE = Stage(
+    name="create_deployment_config",
+    prompt=_CONFIG_PROMPT,
+    required_state=("deployment_plan", "target_platform"),
+    prompt_variables=lambda state: {
+        "deployment_plan_json": state.deployment_plan,
+        "target_platform": state.target_platform,
+        "environment_variables_json": state.environment_variables or {},
+    },
+    output_model=DeploymentConfig,
+    output_key="deployment_config",
+    next_node="execute_deployment",
+    cache_policy=_CONFIG_CACHE_POLICY,
+)
+
+EXEC_STAGE = Stage(
+    name="execute_deployment",
+    prompt=_EXEC_PROMPT,
+    required_state=("deployment_plan", "deployment_config", "target_platform"),
+    prompt_variables=lambda state: {
+        "deployment_plan_json": state.deployment_plan,
+        "deployment_config_json": state.deployment_config,
+        "target_platform": state.target_platform,
+    },
+    output_model=DeploymentResult,
+    output_key="deployment_result",
+    next_node=END,
+    cache_policy=_EXEC_CACHE_POLICY,
+)
+
+BUNDLE_STAGE = Stage(
+    name="one_shot_deploy",
+    prompt=_BUNDLE_PROMPT,
+    required_state=("product_spec", "target_platform"),
+    prompt_variables=lambda state: {
+        "product_spec_json": state.product_spec,
+        "target_platform": state.target_platform,
+        "domain": state.domain or "Not specified",
+        "environment_variables_json": state.environment_variables or {},
+    },
+    output_model=DeploymentBundle,
+    output_key=None,
+    next_node=END,
+    cache_policy=_BUNDLE_CACHE_POLICY,
+)
+
+# Stages of the unfused workflow, in execution order
+_STAGES = (PLAN_STAGE, CONFIG_STAGE, EXEC_STAGE)
 
+# Define the workflow nodes
+create_deployment_plan = partial(_run_llm_stage, stage=PLAN_STAGE)
+create_deployment_config = partial(_run_llm_stage, stage=CONFIG_STAGE)
+execute_deployment = partial(_run_llm_stage, stage=EXEC_STAGE)
+one_shot_deploy = partial(_run_llm_stage, stage=BUNDLE_STAGE)
 
-def execute_deployment(state: DeploymentAgentState) -> DeploymentAgentState:
-    """Execute deployment based on the deployment plan and configuration."""
-    try:
-        deployment_plan = state.get("deployment_plan")
-        deployment_config = state.get("deployment_config")
-        target_platform = state.get("target_platform")
-        
-        if not deployment_plan or not deployment_config or not target_platform:
-            logger.error("Missing required information for deployment execution")
-            return {
-                **state, 
-                "error": "Missing deployment plan, configuration, or target platform", 
-                "next": END
-            }
-        
-        logger.info(f"Executing deployment for platform: {target_platform}")
-        
-        # Create the LLM
-        llm = ChatOpenAI(model="gpt-4o", temperature=0.3)
-        
-        # Create the prompt
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=DEPLOYMENT_EXECUTION_PROMPT),
-            HumanMessage(content="Please simulate the execution of the deployment based on the provided plan and configuration."),
-        ])
-        
-        # Format the prompt
-        formatted_prompt = prompt.format(
-            deployment_plan_json=json.dumps(deployment_plan, indent=2),
-            deployment_config_json=json.dumps(deployment_config, indent=2),
-            target_platform=target_platform,
+
+# Define the edge condition used between workflow nodes
+def _continue_to(next_node: str) -> Callable[[DeploymentAgentState], str]:
+    """Build an edge condition that proceeds to next_node unless a node failed."""
+    return lambda state: END if state.error else next_node
+
+
+def _build_deployment_agent(
+    model: str = "gpt-4o",
+    temperature: float = 0.0,
+    streaming: bool = False,
+    checkpoint_saver: Optional[BaseCheckpointSaver] = None,
+    cache: Optional[BaseCache] = None,
+    fused: bool = True,
+    **kwargs: Any,
+) -> StateGraph:
+    """Compile a new deployment workflow; see create_deployment_agent."""
+    # Create the workflow graph
+    workflow = StateGraph(DeploymentAgentState)
+    
+    llm_options = {"model": model, "temperature": temperature, "streaming": streaming}
+    
+    stages = (BUNDLE_STAGE,) if fused else _STAGES
+    
+    # Add a node per stage, each continuing to the next unless it failed
+    for stage in stages:
+        workflow.add_node(
+            stage.name,
+            partial(_run_llm_stage, stage=stage, **llm_options),
+            cache_policy=stage.cache_policy,
         )
-        
-        # Simulate deployment execution
-        response = llm.invoke([SystemMessage(content=formatted_prompt)])
-        
-        # Parse the response
-        try:
-            # Try to extract JSON if the model enclosed it in code blocks
-            content = response.content
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-                deployment_result = json.loads(json_str)
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0].strip()
-                deployment_result = json.loads(json_str)
-            else:
-                # Fallback to treating the entire response as JSON
-                deployment_result = json.loads(content)
-            
-            logger.info(f"Successfully simulated deployment for {target_platform}")
-            return {**state, "deployment_result": deployment_result, "next": END}
-        except json.JSONDecodeError:
-            logger.error("Failed to parse deployment result as JSON")
-            return {
-                **state, 
-                "error": "Failed to parse deployment result", 
-                "next": END
-            }
-    except Exception as e:
-        logger.error(f"Error in execute_deployment: {str(e)}")
-        return {**state, "error": str(e), "next": END}
-
-
-# Define the router function to determine the next node
-def router(state: DeploymentAgentState) -> Union[Literal["create_deployment_plan", "create_deployment_config", "execute_deployment"], Literal[END]]:
-    """Route to the next node in the workflow based on the state."""
-    if state.get("error"):
-        return END
-    
-    next_node = state.get("next")
-    if next_node == "create_deployment_config":
-        return "create_deployment_config"
-    elif next_node == "execute_deployment":
-        return "execute_deployment"
-    elif next_node == END:
-        return END
-    else:
-        return "create_deployment_plan"
+        if stage.next_node == END:
+            workflow.add_edge(stage.name, END)
+        else:
+            workflow.add_conditional_edges(
+                stage.name,
+                _continue_to(stage.next_node),
+                {stage.next_node: stage.next_node, END: END},
+            )
+    
+    # Set the entry point
+    workflow.set_entry_point(stages[0].name)
+    
+    # Compile the workflow
+    return workflow.compile(
+        checkpointer=checkpoint_saver,
+        cache=cache if cache is not None else InMemoryCache(),
+    )
+
+
+@lru_cache(maxsize=4)
+def _cached_deployment_agent(
+    model: str, temperature: float, streaming: bool, fused: bool
+) -> StateGraph:
+    """Return a shared compiled workflow for one set of model settings."""
+    return _build_deployment_agent(
+        model=model, temperature=temperature, streaming=streaming, fused=fused
+    )
 
 
 @AgentRegistry.register("deployment_agent")
 def create_deployment_agent(
     model: str = "gpt-4o",
-    temperature: float = 0.3,
+    temperature: float = 0.0,
     streaming: bool = False,
-    checkpoint_saver: Optional[MemorySaver] = None,
+    checkpoint_saver: Optional[BaseCheckpointSaver] = None,
+    cache: Optional[BaseCache] = None,
+    fused: bool = True,
     **kwargs: Any,
 ) -> StateGraph:
     """
@@ -397,30 +589,150 @@ def create_deployment_agent(
         model: The OpenAI model to use for the agent
         temperature: The temperature setting for the model
         streaming: Whether to enable streaming responses
-        checkpoint_saver: Optional MemorySaver for checkpointing
+        checkpoint_saver: Optional checkpointer; use open_deployment_agent for
+            a durable SQLite-backed one
+        cache: Optional node cache; defaults to an in-memory cache. Avoid
+            combining the in-memory cache with an in-memory checkpointer, which
+            causes cache misses
+        fused: Whether to produce plan, configuration, and result in one LLM call.
+            Set to False to run them as separate nodes, e.g. to checkpoint or
+            review between phases
         **kwargs: Additional arguments to pass to the agent
         
     Returns:
-        A configured StateGraph workflow for product deployment
+        A configured StateGraph workflow for product deployment. Without a
+        checkpoint_saver, cache, or extra arguments, the compiled graph is
+        shared by every call with the same model settings, so repeated calls
+        skip compilation; otherwise a new graph is compiled for the call.
+        LLM and transport errors raise from ainvoke rather than being stored
+        in the state; batch_deploy reports them per product
     """
-    # Create the workflow graph
-    workflow = StateGraph(DeploymentAgentState)
+    if checkpoint_saver is None and cache is None and not kwargs:
+        return _cached_deployment_agent(model, temperature, streaming, fused)
+    return _build_deployment_agent(
+        model=model,
+        temperature=temperature,
+        streaming=streaming,
+        checkpoint_saver=checkpoint_saver,
+        cache=cache,
+        fused=fused,
+        **kwargs,
+    )
+
+
+@asynccontextmanager
+async def open_deployment_agent(
+    db_path: str = "deployments.db",
+    **kwargs: Any,
+) -> AsyncIterator[StateGraph]:
+    """
+    Create a deployment agent checkpointed to SQLite for durable resume.
     
-    # Add nodes
-    workflow.add_node("create_deployment_plan", create_deployment_plan)
-    workflow.add_node("create_deployment_config", create_deployment_config)
-    workflow.add_node("execute_deployment", execute_deployment)
+    The SQLite connection stays open for the lifetime of the context, so every
+    invocation made through the yielded agent reuses it.
     
-    # Add edges
-    workflow.add_edge("create_deployment_plan", router)
-    workflow.add_edge("create_deployment_config", router)
-    workflow.add_edge("execute_deployment", router)
+    Args:
+        db_path: Path of the SQLite checkpoint database
+        **kwargs: Arguments passed through to create_deployment_agent
+        
+    Yields:
+        A compiled deployment workflow using an AsyncSqliteSaver checkpointer
+    """
+    async with AsyncSqliteSaver.from_conn_string(db_path) as saver:
+        yield _build_deployment_agent(checkpoint_saver=saver, **kwargs)
+
+
+async def batch_deploy(
+    states: List[Dict[str, Any]],
+    max_parallel: int = 5,
+    **kwargs: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Run the deployment workflow for several products concurrently.
     
-    # Set the entry point
-    workflow.set_entry_point("create_deployment_plan")
+    Args:
+        states: Initial workflow states, one per product to deploy
+        max_parallel: Maximum number of workflows running at once
+        **kwargs: Arguments passed through to create_deployment_agent
+        
+    Returns:
+        The final workflow states, in the same order as the inputs. A workflow
+        that raised is returned as its input state with the error set
+    """
+    agent = create_deployment_agent(**kwargs)
+    semaphore = asyncio.Semaphore(max_parallel)
     
-    # Compile the workflow
-    return workflow.compile(checkpointer=checkpoint_saver)
+    async def run_one(state: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                return await agent.ainvoke(state)
+            except Exception as e:
+                return {**state, "error": str(e)}
+    
+    return await asyncio.gather(*(run_one(state) for state in states))
+
+
+async def batch_plan(
+    specs: List[Dict[str, Any]],
+    target_platform: str,
+    domain: Optional[str] = None,
+    model: str = "gpt-4o",
+    temperature: float = 0.0,
+    max_concurrency: int = 16,
+) -> List[Dict[str, Any]]:
+    """
+    Create deployment plans for a fleet of products.
+    
+    Each plan is still its own LLM request; abatch sends them concurrently,
+    at most max_concurrency at a time, on one shared client. Oversized
+    prompts are rejected before sending, and a failed request only affects
+    its own product.
+    
+    Args:
+        specs: Product specifications to plan deployments for
+        target_platform: Platform all products are deployed to
+        domain: Optional domain shared by the deployments
+        model: The OpenAI model to use
+        temperature: The temperature setting for the model
+        max_concurrency: Maximum number of requests in flight at once
+        
+    Returns:
+        One result per specification, in input order: {"deployment_plan": ...}
+        on success or {"error": ...} on failure
+    """
+    results: List[Dict[str, Any]] = []
+    prompts = []
+    pending = []
+    for spec in specs:
+        variables = _serialize_variables(
+            PLAN_STAGE.prompt_variables(
+                DeploymentAgentState(
+                    product_spec=spec,
+                    target_platform=target_platform,
+                    domain=domain,
+                )
+            )
+        )
+        messages = PLAN_STAGE.prompt.format_messages(**variables)
+        prompt_tokens = _count_tokens(messages, model)
+        if prompt_tokens > _MAX_PROMPT_TOKENS:
+            results.append({"error": f"Prompt too large: {prompt_tokens} tokens"})
+            continue
+        results.append({})
+        prompts.append(messages)
+        pending.append(len(results) - 1)
+    
+    structured_llm = _get_llm(model, temperature, False).with_structured_output(DeploymentPlan)
+    plans = await structured_llm.abatch(
+        prompts, config={"max_concurrency": max_concurrency}, return_exceptions=True
+    )
+    for index, plan in zip(pending, plans, strict=True):
+        if isinstance(plan, Exception):
+            logger.error(f"Error in batch_plan: {str(plan)}")
+            results[index] = {"error": str(plan)}
+        else:
+            results[index] = {"deployment_plan": plan.model_dump()}
+    return results
 
 
 # Example usage
@@ -447,7 +759,7 @@ if __name__ == "__main__":
     }
     
     # Run the agent with initial state
-    result = deployment_agent.invoke({
+    result = asyncio.run(deployment_agent.ainvoke({
         "product_spec": example_product_spec,
         "target_platform": "vercel",
         "environment_variables": {
@@ -456,7 +768,7 @@ if __name__ == "__main__":
             "NEXTAUTH_SECRET": "your-secret-key"
         },
         "domain": "remotecollabapp.com"
-    })
+    }))
     
     # Print the result
     if result.get("deployment_result"):
@@ -5,24 +5,57 @@ This module provides a LangGraph workflow agent for SaaS idea generation and val
 The agent can generate new SaaS product ideas, validate them, and provide market analysis.
 """
 
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Any, Dict, List, Literal, Optional, TypedDict, Union, cast
-
-from langchain.output_parsers import PydanticOutputParser
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_openai import ChatOpenAI
-from langgraph.checkpoint import MemorySaver
+import time
+from functools import cache, partial
+from typing import (
+    TYPE_CHECKING,
+    Annotated,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypedDict,
+)
+
+import orjson
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.prompts import (
+    ChatPromptTemplate,
+    HumanMessagePromptTemplate,
+)
+from langchain_core.utils.json import parse_json_markdown
+from langgraph.cache.base import BaseCache
+from langgraph.cache.memory import InMemoryCache
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.config import get_stream_writer
 from langgraph.graph import END, StateGraph
-from pydantic import BaseModel, Field, validator
+from langgraph.types import CachePolicy
+from pydantic import BaseModel, ConfigDict, Field
 
 from . import AgentRegistry
 
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
 
+@cache
+def _chat_openai() -> type["ChatOpenAI"]:
+    """Import ChatOpenAI on first use; the OpenAI client stack is slow to import."""
+    from langchain_openai import ChatOpenAI
+    
+    return ChatOpenAI
+
+
 # Define Pydantic models for structured output
 class MarketAnalysis(BaseModel):
     """Market analysis for a SaaS idea."""
@@ -37,17 +70,13 @@ class MarketAnalysis(BaseModel):
     barriers_to_entry: int = Field(
         ..., description="Barriers to entry score from 1-10 (1=low, 10=high)", ge=1, le=10
     )
-    
-    @validator("growth_potential", "competition_level", "barriers_to_entry")
-    def validate_score(cls, v):
-        if not 1 <= v <= 10:
-            raise ValueError("Score must be between 1 and 10")
-        return v
 
 
 class SaaSIdea(BaseModel):
     """Represents a SaaS product idea with validation metrics."""
     
+    model_config = ConfigDict(extra="ignore", validate_default=False)
+    
     name: str = Field(..., description="Name of the SaaS product")
     tagline: str = Field(..., description="Short, catchy tagline (5-10 words)")
     description: str = Field(..., description="Detailed description (1-2 paragraphs)")
@@ -77,6 +106,52 @@ class SaaSIdea(BaseModel):
     opportunities: List[str] = Field(..., description="Unique opportunities")
 
 
+class GeneratedIdea(BaseModel):
+    """An unvalidated SaaS product idea produced by the generation step."""
+    
+    name: str = Field(..., description="Name of the SaaS product")
+    tagline: str = Field(..., description="Short, catchy tagline (5-10 words)")
+    description: str = Field(..., description="Brief description (2-3 sentences)")
+    target_audience: List[str] = Field(
+        ..., description="List of target audience segments"
+    )
+    problem_solved: str = Field(..., description="Key problem the product solves")
+
+
+class GeneratedIdeas(BaseModel):
+    """Container for the generation step's output."""
+    
+    ideas: List[GeneratedIdea] = Field(..., description="Generated SaaS product ideas")
+
+
+class SelectedIdea(SaaSIdea):
+    """The winning SaaS idea together with the reasoning for selecting it."""
+    
+    selection_reasoning: str = Field(
+        ..., description="Why this idea was selected (2-3 sentences)"
+    )
+
+
+def _usage_counts(usage_metadata: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    """Extract token counts, including prompt-cache reads, from usage metadata."""
+    usage_metadata = usage_metadata or {}
+    return {
+        "input_tokens": usage_metadata.get("input_tokens", 0),
+        "output_tokens": usage_metadata.get("output_tokens", 0),
+        "cached_tokens": usage_metadata.get("input_token_details", {}).get("cache_read", 0),
+    }
+
+
+def _add_usage(
+    left: Optional[Dict[str, int]], right: Optional[Dict[str, int]]
+) -> Dict[str, int]:
+    """State reducer that sums token counts across nodes."""
+    total = dict(left or {})
+    for key, value in (right or {}).items():
+        total[key] = total.get(key, 0) + value
+    return total
+
+
 # Define the state for the idea agent workflow
 class IdeaAgentState(TypedDict):
     """State maintained throughout the idea agent workflow."""
@@ -89,24 +164,23 @@ class IdeaAgentState(TypedDict):
     # Intermediate and output data
     generated_ideas: Optional[List[Dict[str, Any]]]
     validated_ideas: Optional[List[SaaSIdea]]
-    selected_idea: Optional[SaaSIdea]
+    selected_idea: Optional[Dict[str, Any]]
+    
+    # Token usage summed across all LLM calls in the run
+    usage: Annotated[Optional[Dict[str, int]], _add_usage]
     
     # Control flow
-    next: Optional[str]
     error: Optional[str]
 
 
-# Define system prompts for different stages
+# Define system prompts for different stages. The system prompts are static so
+# they form a byte-identical prefix that OpenAI can serve from its prompt cache;
+# everything that varies per run is appended in the human message.
 IDEA_GENERATION_PROMPT = """You are an expert SaaS product strategist and idea generator.
-Your task is to generate innovative SaaS product ideas for the {market_segment} market segment.
-
-Consider these market trends and insights:
-{trends_to_consider}
-
-And these specific user requirements or constraints:
-{user_requirements}
+Your task is to generate innovative SaaS product ideas for the market segment described by the user,
+taking into account the market trends and the user requirements or constraints they provide.
 
-Generate {num_ideas} unique and viable SaaS product ideas. For each idea, provide:
+Generate the requested number of unique and viable SaaS product ideas. For each idea, provide:
 1. Product name
 2. Short tagline (5-10 words)
 3. Brief description (2-3 sentences)
@@ -116,10 +190,18 @@ Generate {num_ideas} unique and viable SaaS product ideas. For each idea, provid
 Be creative but practical. Focus on ideas with real market potential and solving genuine pain points.
 """
 
-IDEA_VALIDATION_PROMPT = """You are an expert SaaS market analyst and product validator.
-Your task is to thoroughly analyze and validate the following SaaS product ideas:
+IDEA_GENERATION_INPUT = """Market segment: {market_segment}
 
-{ideas_json}
+Consider these market trends and insights:
+{trends_to_consider}
+
+And these specific user requirements or constraints:
+{user_requirements}
+
+Please generate {num_ideas} SaaS product ideas based on the provided information."""
+
+IDEA_VALIDATION_PROMPT = """You are an expert SaaS market analyst and product validator.
+Your task is to thoroughly analyze and validate the SaaS product ideas provided by the user.
 
 For each idea, provide a comprehensive validation including:
 1. Overall validation score (1-100)
@@ -140,10 +222,12 @@ Be honest in your assessment - not all ideas will be equally strong.
 Return your analysis in a structured format that matches the SaaSIdea model specification.
 """
 
-IDEA_SELECTION_PROMPT = """You are an expert SaaS product strategist.
-Your task is to select the most promising SaaS product idea from the validated ideas below:
+IDEA_VALIDATION_INPUT = """Please validate the following SaaS ideas:
+
+{ideas_json}"""
 
-{validated_ideas_json}
+IDEA_SELECTION_PROMPT = """You are an expert SaaS product strategist.
+Your task is to select the most promising SaaS product idea from the validated ideas provided by the user.
 
 Consider these factors in your selection:
 1. Overall validation score
@@ -156,278 +240,293 @@ Select the single best idea and explain your reasoning in 2-3 sentences.
 Return only the selected idea in the exact same JSON format as provided, with your reasoning added as a new field called "selection_reasoning".
 """
 
+IDEA_SELECTION_INPUT = """Please select the best SaaS idea from the following validated options:
+
+{validated_ideas_json}"""
+
+# Prompt templates are built once at import and reused by every node call
+_GENERATION_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessage(content=IDEA_GENERATION_PROMPT),
+    HumanMessagePromptTemplate.from_template(IDEA_GENERATION_INPUT),
+])
+
+_VALIDATION_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessage(content=IDEA_VALIDATION_PROMPT),
+    HumanMessagePromptTemplate.from_template(IDEA_VALIDATION_INPUT),
+])
+
+_SELECTION_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessage(content=IDEA_SELECTION_PROMPT),
+    HumanMessagePromptTemplate.from_template(IDEA_SELECTION_INPUT),
+])
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize an object to indented JSON for embedding in a prompt."""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+
+def _bulletize(items: List[str]) -> str:
+    """Format items as a Markdown bullet list."""
+    return "- " + "\n- ".join(items)
+
+
+# Defaults used when the caller does not provide trends or requirements
+_DEFAULT_TRENDS = ["Remote work", "AI automation", "Sustainability"]
+_DEFAULT_REQUIREMENTS = ["Scalable", "User-friendly"]
+
+
+def _generation_cache_key(
+    state: IdeaAgentState, *, model: str, temperature: float, num_ideas: int
+) -> str:
+    """Build an exact-match cache key from the normalized generation inputs."""
+    payload = orjson.dumps(
+        {
+            "model": model,
+            "temperature": temperature,
+            "num_ideas": num_ideas,
+            "segment": " ".join(state["market_segment"].split()).casefold(),
+            "requirements": sorted(state.get("user_requirements") or _DEFAULT_REQUIREMENTS),
+            "trends": sorted(state.get("trends_to_consider") or _DEFAULT_TRENDS),
+        },
+        option=orjson.OPT_SORT_KEYS,
+    )
+    return hashlib.sha256(payload).hexdigest()
+
+
+# How long repeat runs for the same inputs reuse the generated ideas
+_GENERATION_CACHE_TTL = 3600  # seconds
+
+# Validation score lead over the runner-up that selects an idea without the LLM
+_SELECTION_MARGIN = 10
+
 
 # Define the workflow nodes
-def generate_ideas(state: IdeaAgentState) -> IdeaAgentState:
-    """Generate initial SaaS product ideas based on market segment and requirements."""
-    try:
-        logger.info(f"Generating ideas for market segment: {state['market_segment']}")
-        
-        # Default values if not provided
-        trends = state.get("trends_to_consider") or ["Remote work", "AI automation", "Sustainability"]
-        requirements = state.get("user_requirements") or ["Scalable", "User-friendly"]
-        
-        # Create the LLM
-        llm = ChatOpenAI(model="gpt-4o", temperature=0.7)
-        
-        # Create the prompt
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=IDEA_GENERATION_PROMPT),
-            HumanMessage(content="Please generate SaaS product ideas based on the provided information."),
-        ])
-        
-        # Format the prompt
-        formatted_prompt = prompt.format(
-            market_segment=state["market_segment"],
-            trends_to_consider="\n".join([f"- {trend}" for trend in trends]),
-            user_requirements="\n".join([f"- {req}" for req in requirements]),
-            num_ideas=5,
+def _log_usage(
+    node: str, usage_metadata: Optional[Dict[str, Any]], started: float
+) -> Dict[str, int]:
+    """Log token usage and latency for one LLM call and return the counts."""
+    usage = _usage_counts(usage_metadata)
+    logger.info(
+        f"node={node} in={usage['input_tokens']} out={usage['output_tokens']} "
+        f"cached={usage['cached_tokens']} t={time.perf_counter() - started:.2f}s"
+    )
+    return usage
+
+
+async def _generate(
+    llm: "ChatOpenAI",
+    messages: List[BaseMessage],
+    output_model: type[BaseModel],
+    streaming: bool,
+    node: str,
+) -> Tuple[BaseModel, Dict[str, int]]:
+    """
+    Run the LLM and return its output as an instance of output_model.
+    
+    Non-streaming calls use structured output. Streaming calls bind
+    output_model as a forced function call and parse its arguments as they
+    arrive with a partial-JSON parser; each partial result is emitted on
+    LangGraph's custom stream under the node name. Token usage and latency
+    are logged under the node name and returned with the output.
+    """
+    started = time.perf_counter()
+    if not streaming:
+        structured_llm = llm.with_structured_output(output_model, include_raw=True)
+        result = await structured_llm.ainvoke(messages)
+        usage = _log_usage(node, result["raw"].usage_metadata, started)
+        if result["parsing_error"] is not None:
+            raise result["parsing_error"]
+        return result["parsed"], usage
+    
+    bound_llm = llm.bind_tools([output_model], tool_choice=output_model.__name__)
+    writer = get_stream_writer()
+    buffer = ""
+    usage_metadata = None
+    async for chunk in bound_llm.astream(messages):
+        args = "".join(
+            tool_call_chunk["args"] or "" for tool_call_chunk in chunk.tool_call_chunks
         )
-        
-        # Generate ideas
-        response = llm.invoke([SystemMessage(content=formatted_prompt)])
-        
-        # Parse the response - in a real implementation, we would use a more robust parser
-        # For now, we'll assume the LLM returns a well-formatted JSON string
-        try:
-            # Try to extract JSON if the model enclosed it in ```json blocks
-            content = response.content
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-                ideas = json.loads(json_str)
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0].strip()
-                ideas = json.loads(json_str)
-            else:
-                # Fallback to treating the entire response as JSON
-                ideas = json.loads(content)
-            
-            # Ensure ideas is a list
-            if not isinstance(ideas, list):
-                ideas = [ideas]
-            
-            logger.info(f"Successfully generated {len(ideas)} ideas")
-            return {**state, "generated_ideas": ideas, "next": "validate_ideas"}
-        except json.JSONDecodeError:
-            # If JSON parsing fails, use a more lenient approach
-            logger.warning("Failed to parse JSON response, using text extraction")
-            
-            # Re-query with a more explicit instruction for JSON format
-            structured_prompt = prompt.format(
-                market_segment=state["market_segment"],
-                trends_to_consider="\n".join([f"- {trend}" for trend in trends]),
-                user_requirements="\n".join([f"- {req}" for req in requirements]),
-                num_ideas=3,  # Reduce to make it easier
-            )
-            
-            structured_prompt += "\n\nReturn your response as a valid JSON array of objects."
-            
-            response = llm.invoke([SystemMessage(content=structured_prompt)])
-            
-            # Try again with the more explicit instruction
+        buffer += args
+        usage_metadata = chunk.usage_metadata or usage_metadata
+        # Re-parse whenever a value closes
+        if "}" in args or "]" in args:
             try:
-                content = response.content
-                if "```json" in content:
-                    json_str = content.split("```json")[1].split("```")[0].strip()
-                    ideas = json.loads(json_str)
-                elif "```" in content:
-                    json_str = content.split("```")[1].split("```")[0].strip()
-                    ideas = json.loads(json_str)
-                else:
-                    # Fallback to treating the entire response as JSON
-                    ideas = json.loads(content)
-                
-                # Ensure ideas is a list
-                if not isinstance(ideas, list):
-                    ideas = [ideas]
-                
-                logger.info(f"Successfully generated {len(ideas)} ideas on second attempt")
-                return {**state, "generated_ideas": ideas, "next": "validate_ideas"}
+                writer({node: parse_json_markdown(buffer)})
             except json.JSONDecodeError:
-                logger.error("Failed to parse ideas as JSON even with explicit instruction")
-                return {
-                    **state, 
-                    "error": "Failed to parse generated ideas", 
-                    "next": END
-                }
+                pass
+    usage = _log_usage(node, usage_metadata, started)
+    # Parse and validate the complete response in a single pass
+    return output_model.model_validate_json(buffer), usage
+
+
+async def generate_ideas(
+    state: IdeaAgentState,
+    *,
+    llm: "ChatOpenAI",
+    streaming: bool = False,
+    num_ideas: int = 3,
+) -> Dict[str, Any]:
+    """
+    Generate initial SaaS product ideas based on market segment and requirements.
+    
+    Errors propagate instead of being stored in the state: this node is
+    cached, and LangGraph never caches a failed node, so a transient failure
+    is not replayed to later runs with the same inputs.
+    """
+    logger.info(f"Generating ideas for market segment: {state['market_segment']}")
+    
+    # Default values if not provided
+    trends = state.get("trends_to_consider") or _DEFAULT_TRENDS
+    requirements = state.get("user_requirements") or _DEFAULT_REQUIREMENTS
+    
+    # Format the prompt
+    messages = _GENERATION_PROMPT.format_messages(
+        market_segment=state["market_segment"],
+        trends_to_consider=_bulletize(trends),
+        user_requirements=_bulletize(requirements),
+        num_ideas=num_ideas,
+    )
+    
+    # Generate ideas as schema-valid structured output
+    try:
+        result, usage = await _generate(
+            llm, messages, GeneratedIdeas, streaming, "generate_ideas"
+        )
     except Exception as e:
         logger.error(f"Error in generate_ideas: {str(e)}")
-        return {**state, "error": str(e), "next": END}
+        raise
+    ideas = [idea.model_dump() for idea in result.ideas]
+    
+    logger.info(f"Successfully generated {len(ideas)} ideas")
+    return {"generated_ideas": ideas, "usage": usage}
+
+
+async def _validate_one(
+    llm: "ChatOpenAI",
+    idea: Dict[str, Any],
+    streaming: bool,
+) -> Tuple[SaaSIdea, Dict[str, int]]:
+    """Validate a single idea, returning it with the call's token usage."""
+    messages = _VALIDATION_PROMPT.format_messages(ideas_json=_dumps([idea]))
+    return await _generate(llm, messages, SaaSIdea, streaming, "validate_ideas")
 
 
-def validate_ideas(state: IdeaAgentState) -> IdeaAgentState:
+async def validate_ideas(
+    state: IdeaAgentState, *, llm: "ChatOpenAI", streaming: bool = False
+) -> Dict[str, Any]:
     """Validate and analyze the generated SaaS ideas."""
     try:
         ideas = state.get("generated_ideas")
         if not ideas:
             logger.error("No ideas to validate")
-            return {**state, "error": "No ideas to validate", "next": END}
+            return {"error": "No ideas to validate"}
         
         logger.info(f"Validating {len(ideas)} ideas")
         
-        # Create the LLM with lower temperature for more consistent analysis
-        llm = ChatOpenAI(model="gpt-4o", temperature=0.2)
-        
-        # Create output parser for structured output
-        parser = PydanticOutputParser(pydantic_object=SaaSIdea)
-        
-        # Create the prompt
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=IDEA_VALIDATION_PROMPT),
-            HumanMessage(content="Please validate the provided SaaS ideas."),
-        ])
-        
-        # Format the prompt with ideas in JSON format
-        formatted_prompt = prompt.format(
-            ideas_json=json.dumps(ideas, indent=2)
+        # Validate each idea concurrently so one bad response only drops that idea
+        results = await asyncio.gather(
+            *(_validate_one(llm, idea, streaming) for idea in ideas),
+            return_exceptions=True,
         )
         
-        # Validate ideas
-        response = llm.invoke([SystemMessage(content=formatted_prompt)])
+        validated_ideas = []
+        usage: Dict[str, int] = {}
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to validate idea: {str(result)}")
+                # Skip invalid ideas
+                continue
+            validated_idea, idea_usage = result
+            validated_ideas.append(validated_idea)
+            usage = _add_usage(usage, idea_usage)
         
-        # Parse the response
-        try:
-            content = response.content
-            
-            # Try to extract JSON if the model enclosed it in code blocks
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-                validated_ideas_raw = json.loads(json_str)
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0].strip()
-                validated_ideas_raw = json.loads(json_str)
-            else:
-                # Fallback to treating the entire response as JSON
-                validated_ideas_raw = json.loads(content)
-            
-            # Ensure we have a list
-            if not isinstance(validated_ideas_raw, list):
-                validated_ideas_raw = [validated_ideas_raw]
-            
-            # Convert to Pydantic models for validation
-            validated_ideas = []
-            for idea_dict in validated_ideas_raw:
-                try:
-                    # Ensure market_analysis is properly structured
-                    if isinstance(idea_dict.get("market_analysis"), dict):
-                        market_analysis = MarketAnalysis(**idea_dict["market_analysis"])
-                        idea_dict["market_analysis"] = market_analysis.dict()
-                    
-                    # Create and validate the SaaSIdea
-                    validated_idea = SaaSIdea(**idea_dict)
-                    validated_ideas.append(validated_idea.dict())
-                except Exception as e:
-                    logger.warning(f"Failed to validate idea: {str(e)}")
-                    # Skip invalid ideas
-                    continue
-            
-            logger.info(f"Successfully validated {len(validated_ideas)} ideas")
-            
-            if validated_ideas:
-                return {
-                    **state, 
-                    "validated_ideas": validated_ideas, 
-                    "next": "select_best_idea"
-                }
-            else:
-                logger.error("No ideas passed validation")
-                return {
-                    **state, 
-                    "error": "No ideas passed validation", 
-                    "next": END
-                }
-        except json.JSONDecodeError:
-            logger.error("Failed to parse validated ideas as JSON")
-            return {
-                **state, 
-                "error": "Failed to parse validated ideas", 
-                "next": END
-            }
+        logger.info(f"Successfully validated {len(validated_ideas)} ideas")
+        
+        if validated_ideas:
+            return {"validated_ideas": validated_ideas, "usage": usage}
+        else:
+            logger.error("No ideas passed validation")
+            return {"error": "No ideas passed validation"}
     except Exception as e:
         logger.error(f"Error in validate_ideas: {str(e)}")
-        return {**state, "error": str(e), "next": END}
+        return {"error": str(e)}
+
+
+def _with_reasoning(idea: SaaSIdea, reasoning: str) -> Dict[str, Any]:
+    """Serialize a selected idea for the final state, adding the selection reasoning."""
+    return {**idea.model_dump(), "selection_reasoning": reasoning}
 
 
-def select_best_idea(state: IdeaAgentState) -> IdeaAgentState:
+async def select_best_idea(
+    state: IdeaAgentState,
+    *,
+    llm: "ChatOpenAI",
+    streaming: bool = False,
+    force_llm_select: bool = False,
+) -> Dict[str, Any]:
     """Select the best idea from the validated ideas."""
     try:
         validated_ideas = state.get("validated_ideas")
         if not validated_ideas:
             logger.error("No validated ideas to select from")
-            return {**state, "error": "No validated ideas to select from", "next": END}
+            return {"error": "No validated ideas to select from"}
         
         logger.info(f"Selecting best idea from {len(validated_ideas)} validated ideas")
         
         # If there's only one idea, select it directly
         if len(validated_ideas) == 1:
             logger.info("Only one validated idea, selecting it automatically")
-            selected_idea = validated_ideas[0]
-            selected_idea["selection_reasoning"] = "This was the only validated idea."
-            return {**state, "selected_idea": selected_idea, "next": END}
-        
-        # Create the LLM
-        llm = ChatOpenAI(model="gpt-4o", temperature=0.3)
+            selected_idea = _with_reasoning(
+                validated_ideas[0], "This was the only validated idea."
+            )
+            return {"selected_idea": selected_idea}
         
-        # Create the prompt
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=IDEA_SELECTION_PROMPT),
-            HumanMessage(content="Please select the best SaaS idea from the validated options."),
-        ])
+        # Skip the LLM when one idea clearly outscores the rest
+        ranked = sorted(validated_ideas, key=lambda x: x.validation_score, reverse=True)
+        margin = ranked[0].validation_score - ranked[1].validation_score
+        if not force_llm_select and margin >= _SELECTION_MARGIN:
+            selected_idea = _with_reasoning(
+                ranked[0],
+                f"Top validation score with a {margin}-point margin over the runner-up.",
+            )
+            logger.info(f"Selected idea by validation score margin: {selected_idea['name']}")
+            return {"selected_idea": selected_idea}
         
         # Format the prompt
-        formatted_prompt = prompt.format(
-            validated_ideas_json=json.dumps(validated_ideas, indent=2)
+        messages = _SELECTION_PROMPT.format_messages(
+            validated_ideas_json=_dumps([idea.model_dump() for idea in validated_ideas])
         )
         
         # Select the best idea
-        response = llm.invoke([SystemMessage(content=formatted_prompt)])
-        
-        # Parse the response
         try:
-            content = response.content
-            
-            # Try to extract JSON
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-                selected_idea = json.loads(json_str)
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0].strip()
-                selected_idea = json.loads(json_str)
-            else:
-                # Fallback to treating the entire response as JSON
-                selected_idea = json.loads(content)
+            result, usage = await _generate(
+                llm, messages, SelectedIdea, streaming, "select_best_idea"
+            )
+            selected_idea = result.model_dump()
             
             logger.info(f"Successfully selected best idea: {selected_idea.get('name')}")
-            return {**state, "selected_idea": selected_idea, "next": END}
-        except json.JSONDecodeError:
-            logger.error("Failed to parse selected idea as JSON")
+            return {"selected_idea": selected_idea, "usage": usage}
+        except (OutputParserException, ValueError):
+            logger.error("Failed to parse selected idea")
             
             # Fallback: just select the idea with the highest validation score
-            best_idea = max(validated_ideas, key=lambda x: x.get("validation_score", 0))
-            best_idea["selection_reasoning"] = "Selected based on highest validation score due to parsing error."
+            best_idea = _with_reasoning(
+                max(validated_ideas, key=lambda x: x.validation_score),
+                "Selected based on highest validation score due to parsing error.",
+            )
             
-            logger.info(f"Fallback selection of idea with highest score: {best_idea.get('name')}")
-            return {**state, "selected_idea": best_idea, "next": END}
+            logger.info(f"Fallback selection of idea with highest score: {best_idea['name']}")
+            return {"selected_idea": best_idea}
     except Exception as e:
         logger.error(f"Error in select_best_idea: {str(e)}")
-        return {**state, "error": str(e), "next": END}
+        return {"error": str(e)}
 
 
-# Define the router function to determine the next node
-def router(state: IdeaAgentState) -> Union[Literal["generate_ideas", "validate_ideas", "select_best_idea"], Literal[END]]:
-    """Route to the next node in the workflow based on the state."""
-    if state.get("error"):
-        return END
-    
-    next_node = state.get("next")
-    if next_node == "validate_ideas":
-        return "validate_ideas"
-    elif next_node == "select_best_idea":
-        return "select_best_idea"
-    elif next_node == END:
-        return END
-    else:
-        return "generate_ideas"
+# Define the edge condition used between workflow nodes
+def _continue_to(next_node: str) -> Callable[[IdeaAgentState], str]:
+    """Build an edge condition that proceeds to next_node unless a node failed."""
+    return lambda state: END if state.get("error") else next_node
 
 
 @AgentRegistry.register("idea_agent")
@@ -435,40 +534,144 @@ def create_idea_agent(
     model: str = "gpt-4o",
     temperature: float = 0.7,
     streaming: bool = False,
-    checkpoint_saver: Optional[MemorySaver] = None,
+    checkpoint_saver: Optional[BaseCheckpointSaver] = None,
+    cache: Optional[BaseCache] = None,
+    force_llm_select: bool = False,
+    gen_model: str = "gpt-4o-mini",
+    validate_model: Optional[str] = None,
+    select_model: Optional[str] = None,
+    num_ideas: int = 3,
     **kwargs: Any,
 ) -> StateGraph:
     """
     Create a LangGraph workflow agent for SaaS idea generation and validation.
     
     Args:
-        model: The OpenAI model to use for the agent
-        temperature: The temperature setting for the model
+        model: The OpenAI model to use for validation and selection unless
+            overridden by validate_model or select_model
+        temperature: The temperature setting for idea generation
         streaming: Whether to enable streaming responses
-        checkpoint_saver: Optional MemorySaver for checkpointing
+        checkpoint_saver: Optional checkpointer, e.g. an AsyncSqliteSaver for durable runs
+        cache: Optional node cache for generated ideas; defaults to an
+            in-memory cache
+        force_llm_select: Always ask the LLM to select the best idea, even
+            when one idea leads on validation score by a clear margin
+        gen_model: The OpenAI model for the brainstorming-style generation
+            step, where a smaller model gives comparable ideas faster
+        validate_model: The OpenAI model for validation; defaults to model
+        select_model: The OpenAI model for selection; defaults to model
+        num_ideas: How many ideas to generate; each one costs a validation
+            call, so fewer ideas make a run cheaper and faster
         **kwargs: Additional arguments to pass to the agent
         
     Returns:
-        A configured StateGraph workflow for idea generation and validation
+        A configured StateGraph workflow for idea generation and validation.
+        Its nodes are coroutines, so run it with ainvoke (or asyncio.run from
+        synchronous callers). Generation errors raise from ainvoke rather than
+        being stored in the state; batch_generate_ideas reports them per segment
     """
     # Create the workflow graph
     workflow = StateGraph(IdeaAgentState)
     
+    # Create one client per stage, shared by every run of the compiled graph.
+    # Validation and selection use lower temperatures for consistent analysis.
+    # stream_usage makes streamed responses report token usage too.
+    ChatOpenAI = _chat_openai()
+    gen_llm = ChatOpenAI(
+        model=gen_model, temperature=temperature, stream_usage=True
+    )
+    validate_llm = ChatOpenAI(
+        model=validate_model or model, temperature=0.2, stream_usage=True
+    )
+    select_llm = ChatOpenAI(
+        model=select_model or model, temperature=0.3, stream_usage=True
+    )
+    
     # Add nodes
-    workflow.add_node("generate_ideas", generate_ideas)
-    workflow.add_node("validate_ideas", validate_ideas)
-    workflow.add_node("select_best_idea", select_best_idea)
+    workflow.add_node(
+        "generate_ideas",
+        partial(
+            generate_ideas, llm=gen_llm, streaming=streaming, num_ideas=num_ideas
+        ),
+        cache_policy=CachePolicy(
+            key_func=partial(
+                _generation_cache_key,
+                model=gen_model,
+                temperature=temperature,
+                num_ideas=num_ideas,
+            ),
+            ttl=_GENERATION_CACHE_TTL,
+        ),
+    )
+    workflow.add_node(
+        "validate_ideas",
+        partial(validate_ideas, llm=validate_llm, streaming=streaming),
+    )
+    workflow.add_node(
+        "select_best_idea",
+        partial(
+            select_best_idea,
+            llm=select_llm,
+            streaming=streaming,
+            force_llm_select=force_llm_select,
+        ),
+    )
     
     # Add edges
-    workflow.add_edge("generate_ideas", router)
-    workflow.add_edge("validate_ideas", router)
-    workflow.add_edge("select_best_idea", router)
+    workflow.add_conditional_edges(
+        "generate_ideas",
+        _continue_to("validate_ideas"),
+        {"validate_ideas": "validate_ideas", END: END},
+    )
+    workflow.add_conditional_edges(
+        "validate_ideas",
+        _continue_to("select_best_idea"),
+        {"select_best_idea": "select_best_idea", END: END},
+    )
+    workflow.add_edge("select_best_idea", END)
     
     # Set the entry point
     workflow.set_entry_point("generate_ideas")
     
     # Compile the workflow
-    return workflow.compile(checkpointer=checkpoint_saver)
+    return workflow.compile(
+        checkpointer=checkpoint_saver,
+        cache=cache if cache is not None else InMemoryCache(),
+    )
+
+
+async def batch_generate_ideas(
+    states: List[Dict[str, Any]],
+    max_parallel: int = 5,
+    **kwargs: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Run the idea workflow for several market segments concurrently.
+    
+    All workflows share one compiled graph, and with it the same LLM clients
+    and their connection pools.
+    
+    Args:
+        states: Initial workflow states, one per market segment
+        max_parallel: Maximum number of workflows running at once, to stay
+            within OpenAI rate limits
+        **kwargs: Arguments passed through to create_idea_agent
+        
+    Returns:
+        The final workflow states, in the same order as the inputs. A workflow
+        that raised is returned as its input state with the error set
+    """
+    agent = create_idea_agent(**kwargs)
+    semaphore = asyncio.Semaphore(max_parallel)
+    
+    async def run_one(state: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                return await agent.ainvoke(state)
+            except Exception as e:
+                return {**state, "error": str(e)}
+    
+    return await asyncio.gather(*(run_one(state) for state in states))
 
 
 # Example usage
@@ -477,11 +680,11 @@ if __name__ == "__main__":
     idea_agent = create_idea_agent()
     
     # Run the agent with initial state
-    result = idea_agent.invoke({
+    result = asyncio.run(idea_agent.ainvoke({
         "market_segment": "remote work collaboration tools",
         "user_requirements": ["Must integrate with existing tools", "Focus on async communication"],
         "trends_to_consider": ["AI-powered productivity", "Hybrid work models", "Digital wellbeing"]
-    })
+    }))
     
     # Print the result
     if result.get("selected_idea"):
@@ -5,24 +5,66 @@ This module provides a LangGraph workflow agent for SaaS marketing content gener
 The agent can generate SEO content, social media posts, and marketing copy for SaaS products.
 """
 
+import asyncio
 import json
 import logging
-from typing import Any, Dict, List, Literal, Optional, TypedDict, Union, cast
-
-from langchain.output_parsers import PydanticOutputParser
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_openai import ChatOpenAI
-from langgraph.checkpoint import MemorySaver
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import cache, partial
+from typing import (
+    TYPE_CHECKING,
+    Annotated,
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypedDict,
+)
+
+import orjson
+from langchain_core.caches import BaseCache
+from langchain_core.messages import (
+    BaseMessage,
+    BaseMessageChunk,
+    HumanMessage,
+)
+from langchain_core.prompts import (
+    ChatPromptTemplate,
+    SystemMessagePromptTemplate,
+)
+from langchain_core.runnables import Runnable
+from langchain_core.utils.json import parse_json_markdown
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.config import get_stream_writer
 from langgraph.graph import END, StateGraph
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field
 
 from . import AgentRegistry
 
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
 
+@cache
+def _chat_openai() -> type["ChatOpenAI"]:
+    """Import ChatOpenAI on first use; the OpenAI client stack is slow to import."""
+    from langchain_openai import ChatOpenAI
+    
+    return ChatOpenAI
+
+
 # Define Pydantic models for structured output
 class SEOContent(BaseModel):
     """SEO content for a SaaS product."""
@@ -100,6 +142,23 @@ class MarketingStrategy(BaseModel):
     )
 
 
+class MarketingStrategies(BaseModel):
+    """Marketing strategies for several SaaS products, in product order."""
+    
+    strategies: List[MarketingStrategy] = Field(
+        ..., description="One marketing strategy per product, in the order given"
+    )
+
+
+def _merge_errors(left: Optional[str], right: Optional[str]) -> Optional[str]:
+    """State reducer that keeps every error reported by concurrent nodes."""
+    if not left:
+        return right
+    if not right:
+        return left
+    return f"{left}; {right}"
+
+
 # Define the state for the marketing agent workflow
 class MarketingAgentState(TypedDict):
     """State maintained throughout the marketing agent workflow."""
@@ -117,9 +176,8 @@ class MarketingAgentState(TypedDict):
     social_media_content: Optional[Dict[str, Any]]
     marketing_copy: Optional[Dict[str, Any]]
     
-    # Control flow
-    next: Optional[str]
-    error: Optional[str]
+    # Control flow; errors from nodes running in the same step are joined
+    error: Annotated[Optional[str], _merge_errors]
 
 
 # Define system prompts for different stages
@@ -150,6 +208,33 @@ Be specific and practical. Focus on creating a strategy that could be implemente
 Return your strategy in a structured format that matches the MarketingStrategy model.
 """
 
+MARKETING_STRATEGIES_BATCH_PROMPT = """You are an expert SaaS marketing strategist.
+Your task is to create a comprehensive marketing strategy for each of the following {product_count} products:
+
+{products_json}
+
+Target audience:
+{target_audience}
+
+Marketing channels to consider:
+{marketing_channels}
+
+Campaign goals:
+{campaign_goals}
+
+For each product, create a detailed marketing strategy that includes:
+1. Target audience personas with demographics, pain points, and goals
+2. Product positioning statement
+3. Unique selling points
+4. Recommended marketing channels with rationale
+5. Content strategy
+6. Growth tactics
+7. Key performance indicators to track
+
+Be specific and practical. Focus on creating strategies that could be implemented by a marketing team.
+Return exactly one strategy per product, where strategy i corresponds to Product i.
+"""
+
 SEO_CONTENT_PROMPT = """You are an expert SEO content strategist for SaaS products.
 Your task is to create comprehensive SEO content for the following product:
 
@@ -219,304 +304,434 @@ Return your copy in a structured format that matches the MarketingCopy model.
 """
 
 
-# Define the workflow nodes
-def create_marketing_strategy(state: MarketingAgentState) -> MarketingAgentState:
-    """Create a marketing strategy based on the product and target audience."""
-    try:
-        product = state.get("product")
-        target_audience = state.get("target_audience")
-        marketing_channels = state.get("marketing_channels") or [
-            "LinkedIn", "Twitter", "Facebook", "Instagram", "Email", "Content Marketing"
-        ]
-        campaign_goals = state.get("campaign_goals") or [
-            "Increase brand awareness",
-            "Generate leads",
-            "Drive product sign-ups"
-        ]
-        
-        if not product or not target_audience:
-            logger.error("Missing required information for marketing strategy creation")
-            return {
-                **state, 
-                "error": "Missing product information or target audience", 
-                "next": END
-            }
-        
-        logger.info(f"Creating marketing strategy for product: {product.get('name', 'Unknown')}")
-        
-        # Create the LLM
-        llm = ChatOpenAI(model="gpt-4o", temperature=0.5)
-        
-        # Create the prompt
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=MARKETING_STRATEGY_PROMPT),
-            HumanMessage(content="Please create a marketing strategy based on the provided information."),
-        ])
-        
-        # Format the prompt
-        formatted_prompt = prompt.format(
-            product_json=json.dumps(product, indent=2),
-            target_audience="\n".join([f"- {audience}" for audience in target_audience]),
-            marketing_channels="\n".join([f"- {channel}" for channel in marketing_channels]),
-            campaign_goals="\n".join([f"- {goal}" for goal in campaign_goals]),
-        )
-        
-        # Generate marketing strategy
-        response = llm.invoke([SystemMessage(content=formatted_prompt)])
-        
-        # Parse the response
-        try:
-            # Try to extract JSON if the model enclosed it in code blocks
-            content = response.content
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-                marketing_strategy = json.loads(json_str)
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0].strip()
-                marketing_strategy = json.loads(json_str)
-            else:
-                # Fallback to treating the entire response as JSON
-                marketing_strategy = json.loads(content)
-            
-            logger.info(f"Successfully created marketing strategy for {product.get('name', 'Unknown')}")
-            return {
-                **state, 
-                "marketing_strategy": marketing_strategy, 
-                "next": "create_seo_content"
-            }
-        except json.JSONDecodeError:
-            logger.error("Failed to parse marketing strategy as JSON")
-            return {
-                **state, 
-                "error": "Failed to parse marketing strategy", 
-                "next": END
-            }
-    except Exception as e:
-        logger.error(f"Error in create_marketing_strategy: {str(e)}")
-        return {**state, "error": str(e), "next": END}
+@cache
+def _default_llm_cache() -> Optional[BaseCache]:
+    """
+    Return the process-wide response cache, if one is configured.
+    
+    Caching is opt-in: when $CC_LLM_CACHE names a SQLite database, responses
+    are stored there; otherwise there is no default cache.
+    """
+    database_path = os.environ.get("CC_LLM_CACHE")
+    if not database_path:
+        return None
+    
+    from langchain_community.cache import SQLiteCache
+    
+    return SQLiteCache(database_path=database_path)
 
 
-def create_seo_content(state: MarketingAgentState) -> MarketingAgentState:
-    """Create SEO content based on the marketing strategy."""
-    try:
-        product = state.get("product")
-        marketing_strategy = state.get("marketing_strategy")
-        tone = state.get("tone") or "Professional but approachable"
-        
-        if not product or not marketing_strategy:
-            logger.error("Missing required information for SEO content creation")
-            return {
-                **state, 
-                "error": "Missing product information or marketing strategy", 
-                "next": END
-            }
-        
-        logger.info(f"Creating SEO content for product: {product.get('name', 'Unknown')}")
-        
-        # Create the LLM
-        llm = ChatOpenAI(model="gpt-4o", temperature=0.5)
-        
-        # Create the prompt
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=SEO_CONTENT_PROMPT),
-            HumanMessage(content="Please create SEO content based on the provided information."),
-        ])
-        
-        # Format the prompt
-        formatted_prompt = prompt.format(
-            product_json=json.dumps(product, indent=2),
-            marketing_strategy_json=json.dumps(marketing_strategy, indent=2),
-            tone=tone,
-        )
-        
-        # Generate SEO content
-        response = llm.invoke([SystemMessage(content=formatted_prompt)])
-        
-        # Parse the response
-        try:
-            # Try to extract JSON if the model enclosed it in code blocks
-            content = response.content
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-                seo_content = json.loads(json_str)
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0].strip()
-                seo_content = json.loads(json_str)
-            else:
-                # Fallback to treating the entire response as JSON
-                seo_content = json.loads(content)
-            
-            logger.info(f"Successfully created SEO content for {product.get('name', 'Unknown')}")
-            return {
-                **state, 
-                "seo_content": seo_content, 
-                "next": "create_social_media_content"
-            }
-        except json.JSONDecodeError:
-            logger.error("Failed to parse SEO content as JSON")
-            return {
-                **state, 
-                "error": "Failed to parse SEO content", 
-                "next": END
-            }
-    except Exception as e:
-        logger.error(f"Error in create_seo_content: {str(e)}")
-        return {**state, "error": str(e), "next": END}
+def _dumps(obj: Any) -> str:
+    """Serialize an object to indented JSON for embedding in a prompt."""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
 
 
-def create_social_media_content(state: MarketingAgentState) -> MarketingAgentState:
-    """Create social media content based on the marketing strategy."""
-    try:
-        product = state.get("product")
-        marketing_strategy = state.get("marketing_strategy")
-        marketing_channels = state.get("marketing_channels") or [
-            "LinkedIn", "Twitter", "Facebook", "Instagram"
-        ]
-        tone = state.get("tone") or "Professional but approachable"
-        
-        if not product or not marketing_strategy:
-            logger.error("Missing required information for social media content creation")
-            return {
-                **state, 
-                "error": "Missing product information or marketing strategy", 
-                "next": END
-            }
-        
-        logger.info(f"Creating social media content for product: {product.get('name', 'Unknown')}")
-        
-        # Create the LLM
-        llm = ChatOpenAI(model="gpt-4o", temperature=0.7)  # Higher temperature for creativity
-        
-        # Create the prompt
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=SOCIAL_MEDIA_CONTENT_PROMPT),
-            HumanMessage(content="Please create social media content based on the provided information."),
-        ])
+def _bulletize(items: List[str]) -> str:
+    """Format items as a Markdown bullet list."""
+    return "- " + "\n- ".join(items)
+
+
+# The system prompts carry the whole request, so every node sends the same
+# short user turn
+_HUMAN_GO = HumanMessage(content="Proceed.")
+
+# Prompt templates are parsed once at import and shared by every run
+_STRATEGY_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(MARKETING_STRATEGY_PROMPT),
+    _HUMAN_GO,
+])
+
+_STRATEGIES_BATCH_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(MARKETING_STRATEGIES_BATCH_PROMPT),
+    _HUMAN_GO,
+])
+
+_SEO_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(SEO_CONTENT_PROMPT),
+    _HUMAN_GO,
+])
+
+_SOCIAL_MEDIA_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(SOCIAL_MEDIA_CONTENT_PROMPT),
+    _HUMAN_GO,
+])
+
+_COPY_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(MARKETING_COPY_PROMPT),
+    _HUMAN_GO,
+])
+
+
+class RateLimiter:
+    """
+    Client-side limiter for OpenAI calls.
+    
+    Requests are admitted against a sliding 60-second window of requests and
+    tokens (RPM/TPM), and against a concurrency cap that adapts AIMD-style:
+    it halves when OpenAI answers 429 and grows by one after a run of
+    successful calls, up to max_concurrency.
+    """
+    
+    def __init__(
+        self,
+        rpm: int = 60,
+        tpm: int = 150_000,
+        max_concurrency: int = 10,
+        window: float = 60.0,
+        increase_after: int = 20,
+    ) -> None:
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max_concurrency
+        self.window = window
+        self.increase_after = increase_after
+        self.concurrency = max_concurrency
+        self._in_flight = 0
+        self._successes = 0
+        # [start time, tokens] per request still inside the window
+        self._requests: Deque[List[float]] = deque()
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def _get_condition(self) -> asyncio.Condition:
+        """Return the condition for the running event loop, creating it if needed."""
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+        return self._condition
+    
+    async def acquire(self, est_tokens: int) -> List[float]:
+        """Wait until a request of est_tokens fits the limits and reserve it."""
+        condition = self._get_condition()
+        async with condition:
+            while True:
+                now = time.monotonic()
+                while self._requests and now - self._requests[0][0] >= self.window:
+                    self._requests.popleft()
+                used_tokens = sum(tokens for _, tokens in self._requests)
+                if (
+                    self._in_flight < self.concurrency
+                    and len(self._requests) < self.rpm
+                    and (used_tokens + est_tokens <= self.tpm or not self._requests)
+                ):
+                    self._in_flight += 1
+                    request = [now, est_tokens]
+                    self._requests.append(request)
+                    return request
+                
+                # Wake up on release, or when the oldest request leaves the window
+                timeout = (
+                    self._requests[0][0] + self.window - now if self._requests else None
+                )
+                try:
+                    await asyncio.wait_for(condition.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+    
+    async def release(
+        self,
+        request: List[float],
+        used_tokens: Optional[int] = None,
+        rate_limited: bool = False,
+    ) -> None:
+        """Finish a request, recording its real token usage and adapting concurrency."""
+        condition = self._get_condition()
+        async with condition:
+            self._in_flight -= 1
+            if used_tokens is not None:
+                request[1] = used_tokens
+            if rate_limited:
+                self.concurrency = max(1, self.concurrency // 2)
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self.increase_after:
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+                    self._successes = 0
+            condition.notify_all()
+    
+    @staticmethod
+    def estimate_tokens(messages: Sequence[BaseMessage]) -> int:
+        """Estimate prompt tokens at roughly four characters per token."""
+        return sum(len(message.content) for message in messages) // 4
+    
+    async def ainvoke(self, llm: Runnable, messages: Sequence[BaseMessage]) -> Any:
+        """
+        Invoke the LLM once the call fits within the rate limits.
         
-        # Format the prompt
-        formatted_prompt = prompt.format(
-            product_json=json.dumps(product, indent=2),
-            marketing_strategy_json=json.dumps(marketing_strategy, indent=2),
-            marketing_channels=", ".join(marketing_channels),
-            tone=tone,
-        )
+        llm may be a chat model or a structured-output runnable built with
+        include_raw=True, whose raw AIMessage carries the token usage.
+        """
+        from openai import RateLimitError
         
-        # Generate social media content
-        response = llm.invoke([SystemMessage(content=formatted_prompt)])
+        request = await self.acquire(self.estimate_tokens(messages))
+        used_tokens = None
+        rate_limited = False
+        try:
+            response = await llm.ainvoke(messages)
+            raw = response["raw"] if isinstance(response, dict) else response
+            token_usage = raw.response_metadata.get("token_usage") or {}
+            used_tokens = token_usage.get("total_tokens")
+            return response
+        except RateLimitError:
+            rate_limited = True
+            raise
+        finally:
+            await self.release(request, used_tokens, rate_limited)
+    
+    async def astream(
+        self, llm: Runnable, messages: Sequence[BaseMessage]
+    ) -> AsyncIterator[BaseMessageChunk]:
+        """Stream the LLM response once the call fits within the rate limits."""
+        from openai import RateLimitError
         
-        # Parse the response
+        request = await self.acquire(self.estimate_tokens(messages))
+        used_tokens = None
+        rate_limited = False
         try:
-            # Try to extract JSON if the model enclosed it in code blocks
-            content = response.content
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-                social_media_content = json.loads(json_str)
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0].strip()
-                social_media_content = json.loads(json_str)
-            else:
-                # Fallback to treating the entire response as JSON
-                social_media_content = json.loads(content)
-            
-            logger.info(f"Successfully created social media content for {product.get('name', 'Unknown')}")
-            return {
-                **state, 
-                "social_media_content": social_media_content, 
-                "next": "create_marketing_copy"
-            }
-        except json.JSONDecodeError:
-            logger.error("Failed to parse social media content as JSON")
-            return {
-                **state, 
-                "error": "Failed to parse social media content", 
-                "next": END
-            }
-    except Exception as e:
-        logger.error(f"Error in create_social_media_content: {str(e)}")
-        return {**state, "error": str(e), "next": END}
-
-
-def create_marketing_copy(state: MarketingAgentState) -> MarketingAgentState:
-    """Create marketing copy based on the marketing strategy."""
+            async for chunk in llm.astream(messages):
+                if chunk.usage_metadata:
+                    used_tokens = chunk.usage_metadata["total_tokens"]
+                yield chunk
+        except RateLimitError:
+            rate_limited = True
+            raise
+        finally:
+            await self.release(request, used_tokens, rate_limited)
+
+
+# Shared by every marketing workflow in the process, using OpenAI's default limits
+_rate_limiter = RateLimiter()
+
+
+async def _generate(
+    llm: "ChatOpenAI",
+    messages: List[BaseMessage],
+    output_model: Type[BaseModel],
+    node: str,
+    streaming: bool,
+) -> Dict[str, Any]:
+    """
+    Run the LLM under the rate limiter and return its output as a validated dict.
+    
+    output_model is bound as a forced function call, so OpenAI returns its
+    arguments as JSON matching the model's schema instead of free text. When
+    streaming, the arguments are parsed as they arrive with a partial-JSON
+    parser that closes any open strings, arrays, and objects, and each partial
+    result is emitted on LangGraph's custom stream under the node name, so
+    callers streaming with stream_mode="custom" can use fields before the
+    generation finishes.
+    """
+    if not streaming:
+        structured = llm.with_structured_output(
+            output_model, method="function_calling", include_raw=True
+        )
+        result = await _rate_limiter.ainvoke(structured, messages)
+        if result["parsing_error"] is not None:
+            raise result["parsing_error"]
+        return result["parsed"].model_dump()
+    
+    bound = llm.bind_tools([output_model], tool_choice=output_model.__name__)
+    writer = get_stream_writer()
+    buffer = ""
+    async for chunk in _rate_limiter.astream(bound, messages):
+        args = "".join(
+            tool_call_chunk["args"] or "" for tool_call_chunk in chunk.tool_call_chunks
+        )
+        buffer += args
+        # Re-parse whenever a value closes
+        if "}" in args or "]" in args:
+            try:
+                writer({node: parse_json_markdown(buffer)})
+            except json.JSONDecodeError:
+                pass
+    return output_model.model_validate_json(buffer).model_dump()
+
+
+# Defaults for inputs the caller leaves out
+_DEFAULT_STRATEGY_CHANNELS = [
+    "LinkedIn", "Twitter", "Facebook", "Instagram", "Email", "Content Marketing"
+]
+_DEFAULT_SOCIAL_MEDIA_CHANNELS = ["LinkedIn", "Twitter", "Facebook", "Instagram"]
+_DEFAULT_CAMPAIGN_GOALS = [
+    "Increase brand awareness",
+    "Generate leads",
+    "Drive product sign-ups"
+]
+_DEFAULT_TONE = "Professional but approachable"
+
+
+@dataclass(frozen=True, slots=True)
+class NodeSpec:
+    """Description of one LLM-backed node of the marketing workflow."""
+    
+    name: str
+    # What the node creates, as used in log messages
+    description: str
+    prompt: ChatPromptTemplate
+    required_state: Tuple[str, ...]
+    missing_error: str
+    # Prompt variables; values for *_json keys are serialized by the runner
+    prompt_variables: Callable[[MarketingAgentState], Dict[str, Any]]
+    output_model: Type[BaseModel]
+    output_key: str
+
+
+async def _run_node(
+    state: MarketingAgentState,
+    *,
+    spec: NodeSpec,
+    llm: "ChatOpenAI",
+    streaming: bool = False,
+    serialized: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """
+    Run a single workflow node and return the state update it produces.
+    
+    serialized may hold already serialized values for *_json prompt variables
+    that several nodes share, so they are not serialized again.
+    """
     try:
-        product = state.get("product")
-        marketing_strategy = state.get("marketing_strategy")
-        tone = state.get("tone") or "Professional but approachable"
-        
-        if not product or not marketing_strategy:
-            logger.error("Missing required information for marketing copy creation")
-            return {
-                **state, 
-                "error": "Missing product information or marketing strategy", 
-                "next": END
-            }
+        # An output supplied up front, e.g. a strategy from
+        # create_marketing_strategies_batch, is used as is
+        if state.get(spec.output_key):
+            return {}
         
-        logger.info(f"Creating marketing copy for product: {product.get('name', 'Unknown')}")
+        if not all(state.get(key) for key in spec.required_state):
+            logger.error("Missing required information for %s creation", spec.description)
+            return {"error": spec.missing_error}
         
-        # Create the LLM
-        llm = ChatOpenAI(model="gpt-4o", temperature=0.6)
-        
-        # Create the prompt
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=MARKETING_COPY_PROMPT),
-            HumanMessage(content="Please create marketing copy based on the provided information."),
-        ])
+        product_name = state["product"].get("name", "Unknown")
+        logger.info("Creating %s for product: %s", spec.description, product_name)
         
         # Format the prompt
-        formatted_prompt = prompt.format(
-            product_json=json.dumps(product, indent=2),
-            marketing_strategy_json=json.dumps(marketing_strategy, indent=2),
-            tone=tone,
-        )
+        serialized = serialized or {}
+        variables = {
+            key: (serialized.get(key) or _dumps(value)) if key.endswith("_json") else value
+            for key, value in spec.prompt_variables(state).items()
+        }
+        messages = spec.prompt.format_messages(**variables)
         
-        # Generate marketing copy
-        response = llm.invoke([SystemMessage(content=formatted_prompt)])
+        output = await _generate(llm, messages, spec.output_model, spec.name, streaming)
         
-        # Parse the response
-        try:
-            # Try to extract JSON if the model enclosed it in code blocks
-            content = response.content
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-                marketing_copy = json.loads(json_str)
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0].strip()
-                marketing_copy = json.loads(json_str)
-            else:
-                # Fallback to treating the entire response as JSON
-                marketing_copy = json.loads(content)
-            
-            logger.info(f"Successfully created marketing copy for {product.get('name', 'Unknown')}")
-            return {**state, "marketing_copy": marketing_copy, "next": END}
-        except json.JSONDecodeError:
-            logger.error("Failed to parse marketing copy as JSON")
-            return {
-                **state, 
-                "error": "Failed to parse marketing copy", 
-                "next": END
-            }
+        logger.info("Successfully created %s for %s", spec.description, product_name)
+        return {spec.output_key: output}
     except Exception as e:
-        logger.error(f"Error in create_marketing_copy: {str(e)}")
-        return {**state, "error": str(e), "next": END}
-
-
-# Define the router function to determine the next node
-def router(state: MarketingAgentState) -> Union[Literal["create_marketing_strategy", "create_seo_content", "create_social_media_content", "create_marketing_copy"], Literal[END]]:
-    """Route to the next node in the workflow based on the state."""
-    if state.get("error"):
-        return END
-    
-    next_node = state.get("next")
-    if next_node == "create_seo_content":
-        return "create_seo_content"
-    elif next_node == "create_social_media_content":
-        return "create_social_media_content"
-    elif next_node == "create_marketing_copy":
-        return "create_marketing_copy"
-    elif next_node == END:
-        return END
-    else:
-        return "create_marketing_strategy"
+        logger.exception("Error in %s", spec.name)
+        return {"error": str(e)}
+
+
+# Define the workflow nodes
+STRATEGY_SPEC = NodeSpec(
+    name="create_marketing_strategy",
+    description="marketing strategy",
+    prompt=_STRATEGY_PROMPT,
+    required_state=("product", "target_audience"),
+    missing_error="Missing product information or target audience",
+    prompt_variables=lambda state: {
+        "product_json": state["product"],
+        "target_audience": _bulletize(state["target_audience"]),
+        "marketing_channels": _bulletize(
+            state.get("marketing_channels") or _DEFAULT_STRATEGY_CHANNELS
+        ),
+        "campaign_goals": _bulletize(state.get("campaign_goals") or _DEFAULT_CAMPAIGN_GOALS),
+    },
+    output_model=MarketingStrategy,
+    output_key="marketing_strategy",
+)
+
+SEO_SPEC = NodeSpec(
+    name="create_seo_content",
+    description="SEO content",
+    prompt=_SEO_PROMPT,
+    required_state=("product", "marketing_strategy"),
+    missing_error="Missing product information or marketing strategy",
+    prompt_variables=lambda state: {
+        "product_json": state["product"],
+        "marketing_strategy_json": state["marketing_strategy"],
+        "tone": state.get("tone") or _DEFAULT_TONE,
+    },
+    output_model=SEOContent,
+    output_key="seo_content",
+)
+
+SOCIAL_MEDIA_SPEC = NodeSpec(
+    name="create_social_media_content",
+    description="social media content",
+    prompt=_SOCIAL_MEDIA_PROMPT,
+    required_state=("product", "marketing_strategy"),
+    missing_error="Missing product information or marketing strategy",
+    prompt_variables=lambda state: {
+        "product_json": state["product"],
+        "marketing_strategy_json": state["marketing_strategy"],
+        "marketing_channels": ", ".join(
+            state.get("marketing_channels") or _DEFAULT_SOCIAL_MEDIA_CHANNELS
+        ),
+        "tone": state.get("tone") or _DEFAULT_TONE,
+    },
+    output_model=SocialMediaContent,
+    output_key="social_media_content",
+)
+
+COPY_SPEC = NodeSpec(
+    name="create_marketing_copy",
+    description="marketing copy",
+    prompt=_COPY_PROMPT,
+    required_state=("product", "marketing_strategy"),
+    missing_error="Missing product information or marketing strategy",
+    prompt_variables=lambda state: {
+        "product_json": state["product"],
+        "marketing_strategy_json": state["marketing_strategy"],
+        "tone": state.get("tone") or _DEFAULT_TONE,
+    },
+    output_model=MarketingCopy,
+    output_key="marketing_copy",
+)
+
+
+async def generate_content_parallel(
+    state: MarketingAgentState,
+    *,
+    seo_llm: "ChatOpenAI",
+    social_media_llm: "ChatOpenAI",
+    copy_llm: "ChatOpenAI",
+    streaming: bool = False,
+) -> Dict[str, Any]:
+    """Create SEO content, social media content, and marketing copy concurrently.
+    
+    All three depend only on the product and the marketing strategy, so their
+    LLM calls are issued at once instead of one after another.
+    """
+    # Serialize the shared inputs once for all three prompts
+    serialized = {}
+    if state.get("product") and state.get("marketing_strategy"):
+        serialized = {
+            "product_json": _dumps(state["product"]),
+            "marketing_strategy_json": _dumps(state["marketing_strategy"]),
+        }
+    
+    run = partial(_run_node, state, streaming=streaming, serialized=serialized)
+    results = await asyncio.gather(
+        run(spec=SEO_SPEC, llm=seo_llm),
+        run(spec=SOCIAL_MEDIA_SPEC, llm=social_media_llm),
+        run(spec=COPY_SPEC, llm=copy_llm),
+    )
+    
+    update = {}
+    for result in results:
+        update.update(result)
+    
+    errors = [result["error"] for result in results if result.get("error")]
+    if errors:
+        update["error"] = "; ".join(errors)
+    return update
+
+
+# Define the edge condition used between workflow nodes
+def _continue_to(next_node: str) -> Callable[[MarketingAgentState], str]:
+    """Build an edge condition that proceeds to next_node unless a node failed."""
+    return lambda state: END if state.get("error") else next_node
 
 
 @AgentRegistry.register("marketing_agent")
@@ -524,7 +739,8 @@ def create_marketing_agent(
     model: str = "gpt-4o",
     temperature: float = 0.5,
     streaming: bool = False,
-    checkpoint_saver: Optional[MemorySaver] = None,
+    checkpoint_saver: Optional[BaseCheckpointSaver] = None,
+    llm_cache: Optional[BaseCache] = None,
     **kwargs: Any,
 ) -> StateGraph:
     """
@@ -532,28 +748,62 @@ def create_marketing_agent(
     
     Args:
         model: The OpenAI model to use for the agent
-        temperature: The temperature setting for the model
+        temperature: The temperature setting for the strategy and SEO content;
+            marketing copy and social media content run 0.1 and 0.2 higher
+            for more creative output
         streaming: Whether to enable streaming responses
-        checkpoint_saver: Optional MemorySaver for checkpointing
+        checkpoint_saver: Optional checkpointer; use open_marketing_agent for
+            a durable SQLite-backed one
+        llm_cache: Optional cache for LLM responses, keyed on the prompt,
+            model, and sampling parameters; defaults to a SQLite cache at
+            $CC_LLM_CACHE when that is set, and to no cache otherwise. A
+            cache replays the first sampled output for each prompt, which
+            also fixes the output of the higher-temperature nodes
         **kwargs: Additional arguments to pass to the agent
         
     Returns:
-        A configured StateGraph workflow for marketing content generation
+        A configured StateGraph workflow for marketing content generation.
+        Its nodes are coroutines, so run it with ainvoke (or asyncio.run from
+        synchronous callers)
     """
     # Create the workflow graph
     workflow = StateGraph(MarketingAgentState)
     
+    # Create one client per node, shared by every run of the compiled graph so
+    # their HTTP connection pools stay warm. stream_usage makes streamed
+    # responses report token usage too. With a response cache, identical
+    # requests, e.g. re-running a product, are answered from it.
+    llm_cache = llm_cache or _default_llm_cache()
+    ChatOpenAI = _chat_openai()
+    llm_options = {"model": model, "stream_usage": True, "cache": llm_cache}
+    strategy_llm = ChatOpenAI(temperature=temperature, **llm_options)
+    seo_llm = ChatOpenAI(temperature=temperature, **llm_options)
+    social_media_llm = ChatOpenAI(temperature=temperature + 0.2, **llm_options)
+    copy_llm = ChatOpenAI(temperature=temperature + 0.1, **llm_options)
+    
     # Add nodes
-    workflow.add_node("create_marketing_strategy", create_marketing_strategy)
-    workflow.add_node("create_seo_content", create_seo_content)
-    workflow.add_node("create_social_media_content", create_social_media_content)
-    workflow.add_node("create_marketing_copy", create_marketing_copy)
+    workflow.add_node(
+        "create_marketing_strategy",
+        partial(_run_node, spec=STRATEGY_SPEC, llm=strategy_llm, streaming=streaming),
+    )
+    workflow.add_node(
+        "generate_content_parallel",
+        partial(
+            generate_content_parallel,
+            seo_llm=seo_llm,
+            social_media_llm=social_media_llm,
+            copy_llm=copy_llm,
+            streaming=streaming,
+        ),
+    )
     
     # Add edges
-    workflow.add_edge("create_marketing_strategy", router)
-    workflow.add_edge("create_seo_content", router)
-    workflow.add_edge("create_social_media_content", router)
-    workflow.add_edge("create_marketing_copy", router)
+    workflow.add_conditional_edges(
+        "create_marketing_strategy",
+        _continue_to("generate_content_parallel"),
+        {"generate_content_parallel": "generate_content_parallel", END: END},
+    )
+    workflow.add_edge("generate_content_parallel", END)
     
     # Set the entry point
     workflow.set_entry_point("create_marketing_strategy")
@@ -562,6 +812,112 @@ def create_marketing_agent(
     return workflow.compile(checkpointer=checkpoint_saver)
 
 
+@asynccontextmanager
+async def open_marketing_agent(
+    db_path: str = "marketing.db",
+    **kwargs: Any,
+) -> AsyncIterator[StateGraph]:
+    """
+    Create a marketing agent checkpointed to SQLite for durable resume.
+    
+    The SQLite connection stays open for the lifetime of the context, so every
+    invocation made through the yielded agent reuses it.
+    
+    Args:
+        db_path: Path of the SQLite checkpoint database
+        **kwargs: Arguments passed through to create_marketing_agent
+        
+    Yields:
+        A compiled marketing workflow using an AsyncSqliteSaver checkpointer
+    """
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    
+    async with AsyncSqliteSaver.from_conn_string(db_path) as saver:
+        yield create_marketing_agent(checkpoint_saver=saver, **kwargs)
+
+
+async def create_marketing_strategies_batch(
+    products: List[Dict[str, Any]],
+    target_audience: List[str],
+    marketing_channels: Optional[List[str]] = None,
+    campaign_goals: Optional[List[str]] = None,
+    batch_size: int = 5,
+    model: str = "gpt-4o",
+    temperature: float = 0.5,
+    llm_cache: Optional[BaseCache] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Create marketing strategies for a catalog of products, several per LLM call.
+    
+    Products are grouped batch_size at a time into one prompt that asks for a
+    strategy per numbered product, so the system prompt and shared inputs are
+    sent once per group rather than once per product. Groups run concurrently
+    under the shared rate limiter. Each returned strategy can be passed to the
+    marketing agent as the initial marketing_strategy, which then skips
+    straight to content generation.
+    
+    Args:
+        products: Products to create strategies for
+        target_audience: Target audience shared by the products
+        marketing_channels: Marketing channels to consider
+        campaign_goals: Campaign goals shared by the products
+        batch_size: Number of products per LLM call; beyond five to ten,
+            per-call latency grows faster than the saved requests
+        model: The OpenAI model to use
+        temperature: The temperature setting for the model
+        llm_cache: Optional cache for LLM responses; defaults to the SQLite
+            cache at $CC_LLM_CACHE when that is set, and to no cache otherwise
+        
+    Returns:
+        One marketing strategy per product, in input order. Products whose
+        group failed get an {"error": ...} entry instead, so one failed call
+        does not discard the strategies of the other groups
+    """
+    llm = _chat_openai()(
+        model=model,
+        temperature=temperature,
+        stream_usage=True,
+        cache=llm_cache or _default_llm_cache(),
+    )
+    shared_inputs = {
+        "target_audience": _bulletize(target_audience),
+        "marketing_channels": _bulletize(marketing_channels or _DEFAULT_STRATEGY_CHANNELS),
+        "campaign_goals": _bulletize(campaign_goals or _DEFAULT_CAMPAIGN_GOALS),
+    }
+    
+    async def create_batch(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        messages = _STRATEGIES_BATCH_PROMPT.format_messages(
+            product_count=len(batch),
+            products_json="\n\n".join(
+                f"Product {i}:\n{_dumps(product)}" for i, product in enumerate(batch, 1)
+            ),
+            **shared_inputs,
+        )
+        result = await _generate(
+            llm, messages, MarketingStrategies, "create_marketing_strategies_batch", False
+        )
+        strategies = result["strategies"]
+        if len(strategies) != len(batch):
+            raise ValueError(
+                f"Expected {len(batch)} marketing strategies, got {len(strategies)}"
+            )
+        return strategies
+    
+    batches = [products[i:i + batch_size] for i in range(0, len(products), batch_size)]
+    results = await asyncio.gather(
+        *(create_batch(batch) for batch in batches), return_exceptions=True
+    )
+    
+    strategies: List[Dict[str, Any]] = []
+    for batch, result in zip(batches, results, strict=True):
+        if isinstance(result, Exception):
+            logger.error("Error in create_marketing_strategies_batch: %s", result)
+            strategies.extend({"error": str(result)} for _ in batch)
+        else:
+            strategies.extend(result)
+    return strategies
+
+
 # Example usage
 if __name__ == "__main__":
     # Create the marketing agent
@@ -581,13 +937,13 @@ if __name__ == "__main__":
     }
     
     # Run the agent with initial state
-    result = marketing_agent.invoke({
+    result = asyncio.run(marketing_agent.ainvoke({
         "product": example_product,
         "target_audience": ["Remote-first companies", "Distributed teams", "Digital nomads", "Project managers"],
         "marketing_channels": ["LinkedIn", "Twitter", "Product Hunt", "Email"],
         "tone": "Professional but friendly",
         "campaign_goals": ["Increase brand awareness", "Generate leads", "Drive product sign-ups"]
-    })
+    }))
     
     # Print the result
     if result.get("marketing_strategy") and result.get("seo_content") and result.get("social_media_content") and result.get("marketing_copy"):
@@ -6,17 +6,41 @@ The agent takes a validated SaaS idea and generates product specifications,
 technical architecture, and code structure.
 """
 
+import asyncio
 import json
 import logging
-from typing import Any, Dict, List, Literal, Optional, TypedDict, Union, cast
-
-from langchain.output_parsers import PydanticOutputParser
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+import os
+import weakref
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypedDict,
+)
+
+import httpx
+import orjson
+import tiktoken
+from langchain_core.caches import InMemoryCache
+from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.prompts import (
+    ChatPromptTemplate,
+    HumanMessagePromptTemplate,
+)
+from langchain_core.utils.json import parse_json_markdown
 from langchain_openai import ChatOpenAI
-from langgraph.checkpoint import MemorySaver
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.config import get_stream_writer
 from langgraph.graph import END, StateGraph
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field
 
 from . import AgentRegistry
 
@@ -103,6 +127,8 @@ class ProductAgentState(TypedDict):
     
     # Intermediate and output data
     product_specification: Optional[Dict[str, Any]]
+    # product_specification serialized once for the prompts that embed it
+    product_specification_json: Optional[str]
     technical_architecture: Optional[Dict[str, Any]]
     data_models: Optional[List[Dict[str, Any]]]
     code_structure: Optional[Dict[str, Any]]
@@ -112,17 +138,12 @@ class ProductAgentState(TypedDict):
     error: Optional[str]
 
 
-# Define system prompts for different stages
+# Define system prompts for different stages. Per-run inputs go in the *_INPUT
+# human messages, so each system prompt is identical across calls and can be
+# served from OpenAI's prompt cache.
 PRODUCT_SPEC_PROMPT = """You are an expert SaaS product architect and technical lead.
-Your task is to create a detailed product specification based on the validated SaaS idea below:
-
-{idea_json}
-
-Additional requirements to consider:
-{additional_requirements}
-
-Constraints to respect:
-{constraints}
+Your task is to create a detailed product specification based on the validated SaaS idea provided by the user,
+taking into account their additional requirements and respecting their constraints.
 
 Create a comprehensive product specification that includes:
 1. Product name and description
@@ -138,10 +159,17 @@ Be specific and practical. Focus on creating a specification that could be imple
 Return your specification in a structured format that matches the ProductSpecification model.
 """
 
-TECHNICAL_ARCHITECTURE_PROMPT = """You are an expert SaaS technical architect.
-Your task is to design a detailed technical architecture for the product specification below:
+PRODUCT_SPEC_INPUT = """Validated SaaS idea:
+{idea_json}
 
-{product_spec_json}
+Additional requirements to consider:
+{additional_requirements}
+
+Constraints to respect:
+{constraints}"""
+
+TECHNICAL_ARCHITECTURE_PROMPT = """You are an expert SaaS technical architect.
+Your task is to design a detailed technical architecture for the product specification provided by the user.
 
 Create a comprehensive technical architecture that includes:
 1. Frontend architecture (components, state management, routing, etc.)
@@ -154,14 +182,11 @@ Consider scalability, security, and maintainability in your design.
 Return your architecture in a structured format that matches the TechnicalArchitecture model.
 """
 
-CODE_STRUCTURE_PROMPT = """You are an expert SaaS developer and technical lead.
-Your task is to create a detailed code structure for the product with the following specification and architecture:
-
-Product Specification:
-{product_spec_json}
+TECHNICAL_ARCHITECTURE_INPUT = """Product specification:
+{product_spec_json}"""
 
-Technical Architecture:
-{technical_architecture_json}
+CODE_STRUCTURE_PROMPT = """You are an expert SaaS developer and technical lead.
+Your task is to create a detailed code structure for the product whose specification and architecture are provided by the user.
 
 Create a comprehensive code structure that includes:
 1. Directory structure of the codebase (frontend and backend)
@@ -172,216 +197,339 @@ Be specific and practical. Focus on creating a structure that could be implement
 Return your code structure in a structured format that matches the CodeStructure model.
 """
 
+CODE_STRUCTURE_INPUT = """Product Specification:
+{product_spec_json}
 
-# Define the workflow nodes
-def generate_product_specification(state: ProductAgentState) -> ProductAgentState:
-    """Generate product specification based on the validated SaaS idea."""
+Technical Architecture:
+{technical_architecture_json}"""
+
+# Prompt templates are parsed once at import and shared by every run
+_SPEC_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessage(content=PRODUCT_SPEC_PROMPT),
+    HumanMessagePromptTemplate.from_template(PRODUCT_SPEC_INPUT),
+])
+
+_ARCHITECTURE_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessage(content=TECHNICAL_ARCHITECTURE_PROMPT),
+    HumanMessagePromptTemplate.from_template(TECHNICAL_ARCHITECTURE_INPUT),
+])
+
+_CODE_STRUCTURE_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessage(content=CODE_STRUCTURE_PROMPT),
+    HumanMessagePromptTemplate.from_template(CODE_STRUCTURE_INPUT),
+])
+
+
+def _dumps(obj: Any, pretty: bool = False) -> str:
+    """
+    Serialize an object to JSON with sorted keys for embedding in a prompt.
+    
+    Prompt payloads are compact by default; indentation only adds input
+    tokens the model does not need.
+    """
+    option = orjson.OPT_SORT_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+    return orjson.dumps(obj, option=option).decode()
+
+
+# Exact-match response cache shared by every run in the process. Keys cover the
+# full prompt, the model, and its sampling parameters, so re-running the same
+# idea, requirements, and constraints skips the LLM calls; failed calls are
+# never stored.
+_llm_cache = InMemoryCache(maxsize=256)
+
+
+@lru_cache(maxsize=8)
+def _get_encoder(model: str) -> Optional[tiktoken.Encoding]:
+    """
+    Return the tokenizer for a model, loaded once per process.
+    
+    tiktoken downloads its BPE files on first use, so on offline hosts this
+    returns None and token counts fall back to an estimate.
+    """
     try:
-        idea = state.get("idea")
-        if not idea:
-            logger.error("No idea provided for product specification generation")
-            return {**state, "error": "No idea provided", "next": END}
-        
-        logger.info(f"Generating product specification for idea: {idea.get('name', 'Unknown')}")
-        
-        # Default values if not provided
-        additional_requirements = state.get("additional_requirements") or [
-            "Must be scalable", 
-            "Should have a modern UI",
-            "Implement best security practices"
-        ]
-        constraints = state.get("constraints") or [
-            "MVP should be buildable within 8 weeks",
-            "Use standard open-source technologies where possible"
-        ]
-        
-        # Create the LLM
-        llm = ChatOpenAI(model="gpt-4o", temperature=0.3)
-        
-        # Create the prompt
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=PRODUCT_SPEC_PROMPT),
-            HumanMessage(content="Please generate a product specification based on the provided idea."),
-        ])
-        
-        # Format the prompt
-        formatted_prompt = prompt.format(
-            idea_json=json.dumps(idea, indent=2),
-            additional_requirements="\n".join([f"- {req}" for req in additional_requirements]),
-            constraints="\n".join([f"- {constraint}" for constraint in constraints]),
-        )
-        
-        # Generate product specification
-        response = llm.invoke([SystemMessage(content=formatted_prompt)])
-        
-        # Parse the response
         try:
-            # Try to extract JSON if the model enclosed it in ```json blocks
-            content = response.content
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-                product_spec = json.loads(json_str)
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0].strip()
-                product_spec = json.loads(json_str)
-            else:
-                # Fallback to treating the entire response as JSON
-                product_spec = json.loads(content)
-            
-            logger.info(f"Successfully generated product specification for {product_spec.get('name', 'Unknown')}")
-            return {
-                **state, 
-                "product_specification": product_spec, 
-                "next": "generate_technical_architecture"
-            }
-        except json.JSONDecodeError:
-            logger.error("Failed to parse product specification as JSON")
-            return {
-                **state, 
-                "error": "Failed to parse product specification", 
-                "next": END
-            }
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
     except Exception as e:
-        logger.error(f"Error in generate_product_specification: {str(e)}")
-        return {**state, "error": str(e), "next": END}
+        logger.warning(
+            f"Could not load the tokenizer for {model}, estimating tokens: {str(e)}"
+        )
+        return None
+
+
+def _count_tokens(messages: List[BaseMessage], model: str) -> int:
+    """Count the prompt tokens in a list of messages."""
+    encoder = _get_encoder(model)
+    if encoder is None:
+        # Roughly four characters per token
+        return sum(len(message.content) // 4 for message in messages)
+    return sum(len(encoder.encode(message.content)) for message in messages)
+
+
+# One HTTP/2 connection pool per event loop, shared by every chat model on it,
+# so the serial node calls reuse a warm TLS connection and batched calls
+# multiplex over it. Pooled connections belong to the loop that opened them,
+# so each loop (e.g. each asyncio.run) gets its own client.
+_http_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, httpx.AsyncClient
+] = weakref.WeakKeyDictionary()
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Return the running event loop's HTTP client, creating it if needed."""
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            limits=httpx.Limits(max_keepalive_connections=64, keepalive_expiry=30),
+        )
+        _http_clients[loop] = client
+    return client
+
+
+async def _aclose_http_client() -> None:
+    """Close the running event loop's HTTP client, if it has one."""
+    client = _http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+@lru_cache(maxsize=8)
+def _chat_model(
+    model: str, temperature: float, http_client: httpx.AsyncClient
+) -> ChatOpenAI:
+    """Return a shared chat model bound to one HTTP client."""
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        cache=_llm_cache,
+        http_async_client=http_client,
+    )
 
 
-def generate_technical_architecture(state: ProductAgentState) -> ProductAgentState:
-    """Generate detailed technical architecture based on the product specification."""
-    try:
-        product_spec = state.get("product_specification")
-        if not product_spec:
-            logger.error("No product specification provided for technical architecture generation")
-            return {**state, "error": "No product specification provided", "next": END}
-        
-        logger.info(f"Generating technical architecture for: {product_spec.get('name', 'Unknown')}")
-        
-        # Create the LLM
-        llm = ChatOpenAI(model="gpt-4o", temperature=0.3)
-        
-        # Create the prompt
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=TECHNICAL_ARCHITECTURE_PROMPT),
-            HumanMessage(content="Please generate a technical architecture based on the provided product specification."),
-        ])
-        
-        # Format the prompt
-        formatted_prompt = prompt.format(
-            product_spec_json=json.dumps(product_spec, indent=2),
+def _get_llm(model: str, temperature: float) -> ChatOpenAI:
+    """Return a shared chat model so nodes reuse the loop's pooled HTTP client."""
+    return _chat_model(model, temperature, _get_http_client())
+
+
+async def _generate(
+    llm: ChatOpenAI,
+    messages: List[BaseMessage],
+    output_model: type[BaseModel],
+    node: str,
+    streaming: bool,
+) -> BaseModel:
+    """
+    Run the LLM and return its output validated as an output_model instance.
+    
+    output_model is bound as a forced function call, so OpenAI returns its
+    arguments as JSON matching the model's schema instead of free text. When
+    streaming, the arguments are parsed as they arrive with a partial-JSON
+    parser that closes any open strings, arrays, and objects, and each partial
+    result is emitted on LangGraph's custom stream under the node name, so
+    callers streaming with stream_mode="custom" can use fields such as the
+    product name before the generation finishes.
+    """
+    if not streaming:
+        structured_llm = llm.with_structured_output(output_model, method="function_calling")
+        return await structured_llm.ainvoke(messages)
+    
+    bound_llm = llm.bind_tools([output_model], tool_choice=output_model.__name__)
+    writer = get_stream_writer()
+    buffer = ""
+    async for chunk in bound_llm.astream(messages):
+        args = "".join(
+            tool_call_chunk["args"] or "" for tool_call_chunk in chunk.tool_call_chunks
         )
-        
-        # Generate technical architecture
-        response = llm.invoke([SystemMessage(content=formatted_prompt)])
-        
-        # Parse the response
-        try:
-            # Try to extract JSON if the model enclosed it in code blocks
-            content = response.content
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-                technical_architecture = json.loads(json_str)
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0].strip()
-                technical_architecture = json.loads(json_str)
-            else:
-                # Fallback to treating the entire response as JSON
-                technical_architecture = json.loads(content)
-            
-            logger.info(f"Successfully generated technical architecture for {product_spec.get('name', 'Unknown')}")
-            return {
-                **state, 
-                "technical_architecture": technical_architecture, 
-                "next": "generate_code_structure"
-            }
-        except json.JSONDecodeError:
-            logger.error("Failed to parse technical architecture as JSON")
-            return {
-                **state, 
-                "error": "Failed to parse technical architecture", 
-                "next": END
-            }
-    except Exception as e:
-        logger.error(f"Error in generate_technical_architecture: {str(e)}")
-        return {**state, "error": str(e), "next": END}
+        buffer += args
+        # Re-parse whenever a value closes
+        if "}" in args or "]" in args:
+            try:
+                writer({node: parse_json_markdown(buffer)})
+            except json.JSONDecodeError:
+                pass
+    return output_model.model_validate_json(buffer)
+
+
+# Defaults for inputs the caller leaves out
+_DEFAULT_REQUIREMENTS = [
+    "Must be scalable", 
+    "Should have a modern UI",
+    "Implement best security practices"
+]
+_DEFAULT_CONSTRAINTS = [
+    "MVP should be buildable within 8 weeks",
+    "Use standard open-source technologies where possible"
+]
+
+
+@dataclass(frozen=True, slots=True)
+class NodeSpec:
+    """Description of one LLM-backed node of the product workflow."""
+    
+    name: str
+    # What the node generates, as used in log messages
+    description: str
+    prompt: ChatPromptTemplate
+    required_state: Tuple[str, ...]
+    missing_error: str
+    # Prompt variables; *_json values that are not already strings are
+    # serialized by the runner
+    prompt_variables: Callable[[ProductAgentState], Dict[str, Any]]
+    output_model: type[BaseModel]
+    output_key: str
+    next_node: str
+    # Also store the serialized output under "<output_key>_json" for later prompts
+    store_json: bool = False
+
+
+def _format_messages(spec: NodeSpec, state: ProductAgentState) -> List[BaseMessage]:
+    """Format a node's prompt from the state, serializing *_json variables."""
+    variables = {
+        key: _dumps(value) if key.endswith("_json") and not isinstance(value, str) else value
+        for key, value in spec.prompt_variables(state).items()
+    }
+    return spec.prompt.format_messages(**variables)
 
 
-def generate_code_structure(state: ProductAgentState) -> ProductAgentState:
-    """Generate code structure based on the product specification and technical architecture."""
+def _output_update(spec: NodeSpec, output: BaseModel) -> Dict[str, Any]:
+    """
+    Return the state update for a node's validated output.
+    
+    The serialized form stored for later prompts comes from Pydantic's
+    model_dump_json, so the next stages reuse it instead of re-serializing
+    the dict.
+    """
+    update = {spec.output_key: output.model_dump()}
+    if spec.store_json:
+        update[f"{spec.output_key}_json"] = output.model_dump_json()
+    return update
+
+
+async def _run_llm_node(
+    state: ProductAgentState,
+    *,
+    spec: NodeSpec,
+    model: str = "gpt-4o",
+    temperature: float = 0.3,
+    streaming: bool = False,
+) -> Dict[str, Any]:
+    """Run a single workflow node and return the state update it produces."""
     try:
-        product_spec = state.get("product_specification")
-        technical_architecture = state.get("technical_architecture")
-        
-        if not product_spec or not technical_architecture:
-            logger.error("Missing required information for code structure generation")
-            return {
-                **state, 
-                "error": "Missing product specification or technical architecture", 
-                "next": END
-            }
+        if not all(state.get(key) for key in spec.required_state):
+            logger.error(f"Missing required information for {spec.description} generation")
+            return {"error": spec.missing_error, "next": END}
         
-        logger.info(f"Generating code structure for: {product_spec.get('name', 'Unknown')}")
+        subject = state.get("product_specification") or state["idea"]
+        logger.info(f"Generating {spec.description} for: {subject.get('name', 'Unknown')}")
         
-        # Create the LLM
-        llm = ChatOpenAI(model="gpt-4o", temperature=0.3)
+        # Get the shared LLM and format the prompt
+        llm = _get_llm(model, temperature)
+        messages = _format_messages(spec, state)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{spec.name} prompt: {_count_tokens(messages, model)} tokens")
         
-        # Create the prompt
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=CODE_STRUCTURE_PROMPT),
-            HumanMessage(content="Please generate a code structure based on the provided specification and architecture."),
-        ])
-        
-        # Format the prompt
-        formatted_prompt = prompt.format(
-            product_spec_json=json.dumps(product_spec, indent=2),
-            technical_architecture_json=json.dumps(technical_architecture, indent=2),
-        )
+        output = await _generate(llm, messages, spec.output_model, spec.name, streaming)
         
-        # Generate code structure
-        response = llm.invoke([SystemMessage(content=formatted_prompt)])
-        
-        # Parse the response
-        try:
-            # Try to extract JSON if the model enclosed it in code blocks
-            content = response.content
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-                code_structure = json.loads(json_str)
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0].strip()
-                code_structure = json.loads(json_str)
-            else:
-                # Fallback to treating the entire response as JSON
-                code_structure = json.loads(content)
-            
-            logger.info(f"Successfully generated code structure for {product_spec.get('name', 'Unknown')}")
-            return {**state, "code_structure": code_structure, "next": END}
-        except json.JSONDecodeError:
-            logger.error("Failed to parse code structure as JSON")
-            return {
-                **state, 
-                "error": "Failed to parse code structure", 
-                "next": END
-            }
+        logger.info(f"Successfully generated {spec.description} for {subject.get('name', 'Unknown')}")
+        return {**_output_update(spec, output), "next": spec.next_node}
     except Exception as e:
-        logger.error(f"Error in generate_code_structure: {str(e)}")
-        return {**state, "error": str(e), "next": END}
+        logger.error(f"Error in {spec.name}: {str(e)}")
+        return {"error": str(e), "next": END}
+
+
+SPEC_NODE = NodeSpec(
+    name="generate_product_specification",
+    description="product specification",
+    prompt=_SPEC_PROMPT,
+    required_state=("idea",),
+    missing_error="No idea provided",
+    prompt_variables=lambda state: {
+        "idea_json": state["idea"],
+        "additional_requirements": "; ".join(
+            state.get("additional_requirements") or _DEFAULT_REQUIREMENTS
+        ),
+        "constraints": "; ".join(state.get("constraints") or _DEFAULT_CONSTRAINTS),
+    },
+    output_model=ProductSpecification,
+    output_key="product_specification",
+    next_node="generate_technical_architecture",
+    store_json=True,
+)
+
+ARCHITECTURE_NODE = NodeSpec(
+    name="generate_technical_architecture",
+    description="technical architecture",
+    prompt=_ARCHITECTURE_PROMPT,
+    required_state=("product_specification",),
+    missing_error="No product specification provided",
+    prompt_variables=lambda state: {
+        "product_spec_json": (
+            state.get("product_specification_json") or state["product_specification"]
+        ),
+    },
+    output_model=TechnicalArchitecture,
+    output_key="technical_architecture",
+    next_node="generate_code_structure",
+)
+
+CODE_STRUCTURE_NODE = NodeSpec(
+    name="generate_code_structure",
+    description="code structure",
+    prompt=_CODE_STRUCTURE_PROMPT,
+    required_state=("product_specification", "technical_architecture"),
+    missing_error="Missing product specification or technical architecture",
+    prompt_variables=lambda state: {
+        "product_spec_json": (
+            state.get("product_specification_json") or state["product_specification"]
+        ),
+        "technical_architecture_json": state["technical_architecture"],
+    },
+    output_model=CodeStructure,
+    output_key="code_structure",
+    next_node=END,
+)
+
+
+# Define the workflow nodes
+async def generate_product_specification(
+    state: ProductAgentState, **kwargs: Any
+) -> Dict[str, Any]:
+    """Generate product specification based on the validated SaaS idea."""
+    return await _run_llm_node(state, spec=SPEC_NODE, **kwargs)
+
+
+async def generate_technical_architecture(
+    state: ProductAgentState, **kwargs: Any
+) -> Dict[str, Any]:
+    """Generate detailed technical architecture based on the product specification."""
+    return await _run_llm_node(state, spec=ARCHITECTURE_NODE, **kwargs)
+
+
+async def generate_code_structure(
+    state: ProductAgentState, **kwargs: Any
+) -> Dict[str, Any]:
+    """Generate code structure based on the product specification and technical architecture."""
+    return await _run_llm_node(state, spec=CODE_STRUCTURE_NODE, **kwargs)
+
+
+# Map each node's "next" value to the node the router should run
+_ROUTE: Dict[str, str] = {
+    "generate_technical_architecture": "generate_technical_architecture",
+    "generate_code_structure": "generate_code_structure",
+    END: END,
+}
 
 
 # Define the router function to determine the next node
-def router(state: ProductAgentState) -> Union[Literal["generate_product_specification", "generate_technical_architecture", "generate_code_structure"], Literal[END]]:
+def router(state: ProductAgentState) -> str:
     """Route to the next node in the workflow based on the state."""
     if state.get("error"):
         return END
-    
-    next_node = state.get("next")
-    if next_node == "generate_technical_architecture":
-        return "generate_technical_architecture"
-    elif next_node == "generate_code_structure":
-        return "generate_code_structure"
-    elif next_node == END:
-        return END
-    else:
-        return "generate_product_specification"
+    return _ROUTE.get(state.get("next"), "generate_product_specification")
 
 
 @AgentRegistry.register("product_agent")
@@ -389,34 +537,73 @@ def create_product_agent(
     model: str = "gpt-4o",
     temperature: float = 0.3,
     streaming: bool = False,
-    checkpoint_saver: Optional[MemorySaver] = None,
+    checkpoint_saver: Optional[BaseCheckpointSaver] = None,
+    spec_model: Optional[str] = None,
+    arch_model: Optional[str] = None,
+    code_model: str = "gpt-4o-mini",
     **kwargs: Any,
 ) -> StateGraph:
     """
     Create a LangGraph workflow agent for SaaS product generation.
     
     Args:
-        model: The OpenAI model to use for the agent
+        model: The OpenAI model to use unless overridden by spec_model or
+            arch_model
         temperature: The temperature setting for the model
-        streaming: Whether to enable streaming responses
-        checkpoint_saver: Optional MemorySaver for checkpointing
+        streaming: Whether to stream responses, emitting partially parsed
+            output on LangGraph's custom stream as it arrives
+        checkpoint_saver: Optional checkpointer; use open_product_agent for a
+            durable SQLite-backed one
+        spec_model: The OpenAI model for the product specification; defaults
+            to model
+        arch_model: The OpenAI model for the technical architecture; defaults
+            to model
+        code_model: The OpenAI model for the code structure, which mostly lays
+            out directories and files from the specification and architecture,
+            so a smaller model gives comparable output faster
         **kwargs: Additional arguments to pass to the agent
         
     Returns:
-        A configured StateGraph workflow for product generation
+        A configured StateGraph workflow for product generation.
+        Its nodes are coroutines, so run it with ainvoke (or asyncio.run from
+        synchronous callers)
     """
     # Create the workflow graph
     workflow = StateGraph(ProductAgentState)
     
     # Add nodes
-    workflow.add_node("generate_product_specification", generate_product_specification)
-    workflow.add_node("generate_technical_architecture", generate_technical_architecture)
-    workflow.add_node("generate_code_structure", generate_code_structure)
+    workflow.add_node(
+        "generate_product_specification",
+        partial(
+            generate_product_specification,
+            model=spec_model or model,
+            temperature=temperature,
+            streaming=streaming,
+        ),
+    )
+    workflow.add_node(
+        "generate_technical_architecture",
+        partial(
+            generate_technical_architecture,
+            model=arch_model or model,
+            temperature=temperature,
+            streaming=streaming,
+        ),
+    )
+    workflow.add_node(
+        "generate_code_structure",
+        partial(
+            generate_code_structure,
+            model=code_model,
+            temperature=temperature,
+            streaming=streaming,
+        ),
+    )
     
     # Add edges
-    workflow.add_edge("generate_product_specification", router)
-    workflow.add_edge("generate_technical_architecture", router)
-    workflow.add_edge("generate_code_structure", router)
+    workflow.add_conditional_edges("generate_product_specification", router)
+    workflow.add_conditional_edges("generate_technical_architecture", router)
+    workflow.add_conditional_edges("generate_code_structure", router)
     
     # Set the entry point
     workflow.set_entry_point("generate_product_specification")
@@ -425,6 +612,134 @@ def create_product_agent(
     return workflow.compile(checkpointer=checkpoint_saver)
 
 
+@asynccontextmanager
+async def open_product_agent(
+    db_path: Optional[str] = None,
+    **kwargs: Any,
+) -> AsyncIterator[StateGraph]:
+    """
+    Create a product agent checkpointed to SQLite for durable resume.
+    
+    Re-invoking the agent with the same thread_id resumes after the last
+    completed node, so a crashed run does not repeat finished LLM calls. The
+    SQLite connection and the pooled HTTP client stay open for the lifetime
+    of the context and are closed on exit.
+    
+    Args:
+        db_path: Path of the SQLite checkpoint database; defaults to
+            $COMMANDCORE_CKPT, or products.db when unset
+        **kwargs: Arguments passed through to create_product_agent
+        
+    Yields:
+        A compiled product workflow using an AsyncSqliteSaver checkpointer
+    """
+    db_path = db_path or os.environ.get("COMMANDCORE_CKPT", "products.db")
+    async with AsyncSqliteSaver.from_conn_string(db_path) as saver:
+        try:
+            yield create_product_agent(checkpoint_saver=saver, **kwargs)
+        finally:
+            await _aclose_http_client()
+
+
+async def batch_generate_products(
+    states: List[Dict[str, Any]],
+    max_parallel: int = 10,
+    timeout_per_item: Optional[float] = None,
+    **kwargs: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Run the product workflow for several ideas concurrently.
+    
+    Args:
+        states: Initial workflow states, one per idea
+        max_parallel: Maximum number of workflows running at once, to stay
+            within OpenAI rate limits
+        timeout_per_item: Optional time limit in seconds for each workflow; a
+            workflow that exceeds it is returned with an error
+        **kwargs: Arguments passed through to create_product_agent
+        
+    Returns:
+        The final workflow states, in the same order as the inputs. A workflow
+        that timed out or raised is returned as its input state with the
+        error set
+    """
+    agent = create_product_agent(**kwargs)
+    semaphore = asyncio.Semaphore(max_parallel)
+    
+    async def run_one(state: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(agent.ainvoke(state), timeout_per_item)
+            except asyncio.TimeoutError:
+                logger.error(f"Product workflow timed out after {timeout_per_item}s")
+                return {**state, "error": f"Timed out after {timeout_per_item}s"}
+            except Exception as e:
+                logger.error(f"Product workflow failed: {str(e)}")
+                return {**state, "error": str(e)}
+    
+    return await asyncio.gather(*(run_one(state) for state in states))
+
+
+async def run_many(
+    states: List[Dict[str, Any]],
+    model: str = "gpt-4o",
+    temperature: float = 0.3,
+    code_model: str = "gpt-4o-mini",
+    max_concurrency: int = 10,
+) -> List[Dict[str, Any]]:
+    """
+    Run the product pipeline for many ideas, one stage at a time.
+    
+    Each stage sends all of its requests through one llm.abatch call on the
+    shared client, bounded by max_concurrency, instead of running a LangGraph
+    workflow per idea. A failure only affects its own idea, which skips the
+    remaining stages and is returned with an error.
+    
+    Args:
+        states: Initial workflow states, one per idea
+        model: The OpenAI model for the specification and architecture
+        temperature: The temperature setting for the model
+        code_model: The OpenAI model for the code structure
+        max_concurrency: Maximum number of requests in flight at once
+        
+    Returns:
+        The final states, in the same order as the inputs
+    """
+    results = [dict(state) for state in states]
+    stages = (
+        (SPEC_NODE, model),
+        (ARCHITECTURE_NODE, model),
+        (CODE_STRUCTURE_NODE, code_model),
+    )
+    for spec, stage_model in stages:
+        pending = []
+        for result in results:
+            if result.get("error"):
+                continue
+            if not all(result.get(key) for key in spec.required_state):
+                result["error"] = spec.missing_error
+                continue
+            pending.append(result)
+        if not pending:
+            break
+        
+        structured_llm = _get_llm(stage_model, temperature).with_structured_output(
+            spec.output_model, method="function_calling"
+        )
+        outputs = await structured_llm.abatch(
+            [_format_messages(spec, result) for result in pending],
+            config={"max_concurrency": max_concurrency},
+            return_exceptions=True,
+        )
+        for result, output in zip(pending, outputs, strict=True):
+            if isinstance(output, Exception):
+                logger.error(f"Error in {spec.name}: {str(output)}")
+                result["error"] = str(output)
+                continue
+            result.update(_output_update(spec, output))
+    return results
+
+
 # Example usage
 if __name__ == "__main__":
     # Create the product agent
@@ -449,7 +764,7 @@ if __name__ == "__main__":
     }
     
     # Run the agent with initial state
-    result = product_agent.invoke({
+    result = asyncio.run(product_agent.ainvoke({
         "idea": example_idea,
         "additional_requirements": [
             "Must integrate with popular tools like Slack and Google Workspace",
@@ -460,7 +775,7 @@ if __name__ == "__main__":
             "MVP should be buildable within 8 weeks",
             "Initial focus on web platform, then mobile apps"
         ]
-    })
+    }))
     
     # Print the result
     if result.get("product_specification"):
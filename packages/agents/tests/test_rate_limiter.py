@@ -0,0 +1,142 @@
+"""Tests for the marketing agent's client-side OpenAI rate limiter."""
+
+import asyncio
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from openai import RateLimitError
+
+from commandcore_agents.marketing_agent import RateLimiter
+
+MESSAGES = [HumanMessage(content="Proceed.")]
+
+
+def _rate_limit_error() -> RateLimitError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    return RateLimitError(
+        "Rate limit reached", response=httpx.Response(429, request=request), body=None
+    )
+
+
+class FakeLLM:
+    """Minimal runnable standing in for a chat model."""
+    
+    def __init__(self, error: Exception | None = None) -> None:
+        self.error = error
+        self.started = asyncio.Event()
+        self.finish = asyncio.Event()
+        self.finish.set()
+    
+    async def ainvoke(self, messages):
+        self.started.set()
+        await self.finish.wait()
+        if self.error is not None:
+            raise self.error
+        return AIMessage(
+            content="ok", response_metadata={"token_usage": {"total_tokens": 5}}
+        )
+
+
+@pytest.mark.asyncio
+async def test_blocks_at_rpm_limit_until_window_passes():
+    limiter = RateLimiter(rpm=2, tpm=1_000_000, window=0.2)
+    for _ in range(2):
+        await limiter.release(await limiter.acquire(1))
+    
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(limiter.acquire(1), 0.05)
+    
+    request = await asyncio.wait_for(limiter.acquire(1), 1.0)
+    await limiter.release(request)
+
+
+@pytest.mark.asyncio
+async def test_blocks_at_tpm_limit_until_window_passes():
+    limiter = RateLimiter(rpm=100, tpm=100, window=0.2)
+    await limiter.release(await limiter.acquire(80))
+    
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(limiter.acquire(30), 0.05)
+    
+    request = await asyncio.wait_for(limiter.acquire(30), 1.0)
+    await limiter.release(request)
+
+
+@pytest.mark.asyncio
+async def test_admits_oversized_request_when_window_is_empty():
+    limiter = RateLimiter(rpm=100, tpm=100, window=0.2)
+    request = await asyncio.wait_for(limiter.acquire(500), 0.05)
+    await limiter.release(request)
+
+
+@pytest.mark.asyncio
+async def test_blocks_at_concurrency_limit_until_release():
+    limiter = RateLimiter(max_concurrency=1)
+    request = await limiter.acquire(1)
+    
+    waiter = asyncio.create_task(limiter.acquire(1))
+    await asyncio.sleep(0.05)
+    assert not waiter.done()
+    
+    await limiter.release(request)
+    await limiter.release(await asyncio.wait_for(waiter, 1.0))
+
+
+@pytest.mark.asyncio
+async def test_halves_concurrency_on_rate_limit_error():
+    limiter = RateLimiter(max_concurrency=8)
+    llm = FakeLLM(error=_rate_limit_error())
+    
+    with pytest.raises(RateLimitError):
+        await limiter.ainvoke(llm, MESSAGES)
+    assert limiter.concurrency == 4
+    
+    for _ in range(5):
+        with pytest.raises(RateLimitError):
+            await limiter.ainvoke(llm, MESSAGES)
+    assert limiter.concurrency == 1
+
+
+@pytest.mark.asyncio
+async def test_grows_concurrency_after_successes():
+    limiter = RateLimiter(max_concurrency=4, increase_after=3)
+    limiter.concurrency = 1
+    llm = FakeLLM()
+    
+    for _ in range(2):
+        await limiter.ainvoke(llm, MESSAGES)
+    assert limiter.concurrency == 1
+    
+    await limiter.ainvoke(llm, MESSAGES)
+    assert limiter.concurrency == 2
+    
+    for _ in range(9):
+        await limiter.ainvoke(llm, MESSAGES)
+    assert limiter.concurrency == 4
+
+
+@pytest.mark.asyncio
+async def test_records_reported_token_usage():
+    limiter = RateLimiter()
+    await limiter.ainvoke(FakeLLM(), MESSAGES)
+    assert [tokens for _, tokens in limiter._requests] == [5]
+
+
+@pytest.mark.asyncio
+async def test_releases_slot_when_call_is_cancelled():
+    limiter = RateLimiter(max_concurrency=1)
+    llm = FakeLLM()
+    llm.finish.clear()
+    
+    task = asyncio.create_task(limiter.ainvoke(llm, MESSAGES))
+    await asyncio.wait_for(llm.started.wait(), 1.0)
+    assert limiter._in_flight == 1
+    
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert limiter._in_flight == 0
+    
+    llm.finish.set()
+    await asyncio.wait_for(limiter.ainvoke(llm, MESSAGES), 1.0)